@@ -1,48 +1,128 @@
-import json
+import asyncio
+import copy
 import re
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Set, Tuple
 
 import aiosqlite
 import discord
+import orjson
 from discord.ext import commands, tasks
 from ezcord.internal.dc import slash_command
 
 from cogs.systems import preChecks
 
+
+async def _authorize(interaction) -> bool:
+    """Gate a component interaction: admin permissions, then maintenance mode.
+
+    Non-admins get answered directly instead of paying for a defer round-trip
+    first. Returns True when the handler may proceed (already deferred).
+    """
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message(
+            "You need administrator permissions to use this button.", ephemeral=True
+        )
+        return False
+
+    # Defer the response to prevent timeouts
+    await interaction.response.defer(ephemeral=True)
+
+    # Check if we're in maintenance mode
+    check = await preChecks(interaction)
+    if check is True:
+        return False
+
+    return True
+
+# Matches Discord's default "Name1234" username pattern; compiled once so the
+# join path doesn't go through the re cache on every member
+_DEFAULT_NAME_RE = re.compile(r'[A-Za-z]+\d{4}\Z')
+
+# Pulls a user ID back out of a mention in an alert embed
+_USER_MENTION_RE = re.compile(r'<@!?(\d+)>')
+
+# Human-readable names for the detection rules, built once at import time
+# instead of per lookup
+_RULE_NAMES = {
+    "new_account": "Account age < 7 days",
+    "no_avatar": "No avatar",
+    "alt_name": "Username/display name contains 'alt'",
+    "default_name": "Username matches Discord default pattern",
+    "previous_ban": "Previously banned under different account with same username",
+    "quick_join": "Joined within 2 minutes of another new account"
+}
+
+# SQL for the per-join hot path, defined once so every execute() passes the
+# exact same string object and sqlite3's statement cache can reuse the
+# prepared plan
+_SQL_GET_SETTINGS = "SELECT settings FROM alt_settings WHERE server_id = ?"
+_SQL_FETCH_JOIN_CONTEXT = """
+    SELECT
+        (SELECT settings FROM alt_settings WHERE server_id = ?1),
+        (SELECT preferences FROM servers WHERE server_id = ?1),
+        EXISTS(SELECT 1 FROM alt_dismissed WHERE server_id = ?1 AND user_id = ?2)
+"""
+_SQL_PREVIOUS_BAN_SAME_NAME = """
+    SELECT EXISTS(
+        SELECT 1 FROM bans b
+        JOIN ban_actions ba ON b.id = ba.ban_id
+        WHERE b.origin_server_id = ? AND b.user_id != ? AND b.username = ?
+            AND ba.action = 'Accepted'
+    )
+"""
+_SQL_INSERT_DISMISSED = """
+    INSERT OR REPLACE INTO alt_dismissed (server_id, user_id, timestamp)
+    VALUES (?, ?, ?)
+"""
+_SQL_INSERT_ACTIONS = """
+    INSERT INTO alt_actions (server_id, user_id, action, by_user_id, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
 class AltDetectionView(discord.ui.View):
-    """UI with Kick/Ban/Dismiss buttons for alt account alerts"""
+    """UI with Kick/Ban/Dismiss buttons for alt account alerts.
+
+    Persistent and stateless: one instance is registered with the bot and
+    reused for every alert, so buttons keep working across restarts and we
+    don't keep a live View object around for each flagged join. The flagged
+    user and heat score are read back out of the alert embed itself.
+    """
 
-    def __init__(self, user_id: int, heat_score: int, triggered_rules: Dict[str, int], cog):
-        super().__init__(timeout=86400)  # Buttons expire after 24 hours
-        self.user_id = user_id  # The user who joined
-        self.heat_score = heat_score  # Total heat score
-        self.triggered_rules = triggered_rules  # Rules that were triggered and their heat values
+    def __init__(self, cog):
+        super().__init__(timeout=None)
         self.cog = cog
-        self.expiry_time = datetime.now(timezone.utc) + timedelta(hours=24)
 
-    @discord.ui.button(label="Kick", style=discord.ButtonStyle.primary, custom_id="kick_user")
-    async def kick_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
+    @staticmethod
+    def _alert_details(message) -> Tuple[int, int]:
+        """Parse the flagged user's ID and heat score from the alert embed"""
+        embed = message.embeds[0]
+        user_id = int(_USER_MENTION_RE.search(embed.description).group(1))
 
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
+        heat_score = 0
+        for field in embed.fields:
+            if field.name == "Heat Score":
+                heat_score = int(field.value.split("/")[0])
+                break
+
+        return user_id, heat_score
 
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
+    @discord.ui.button(label="Kick", style=discord.ButtonStyle.primary, custom_id="alt_kick_user")
+    async def kick_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        # Permission and maintenance gate
+        if not await _authorize(interaction):
             return
 
+        user_id, heat_score = self._alert_details(interaction.message)
+
         # Kick the user from this server
         try:
-            member = interaction.guild.get_member(self.user_id)
+            member = interaction.guild.get_member(user_id)
             if member:
-                await member.kick(reason=f"LinkBot: Possible alt account (Heat Score: {self.heat_score})")
-                success_msg = f"User <@{self.user_id}> has been kicked from the server."
+                await member.kick(reason=f"LinkBot: Possible alt account (Heat Score: {heat_score})")
+                success_msg = f"User <@{user_id}> has been kicked from the server."
             else:
                 success_msg = "User is no longer in the server."
         except discord.Forbidden:
@@ -50,97 +130,64 @@ class AltDetectionView(discord.ui.View):
         except discord.HTTPException as e:
             success_msg = f"Failed to kick the user: {str(e)}"
 
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
+        # Update the message; drop the buttons since the alert is handled
+        # (the view instance is shared, so we never mutate its children)
         embed = interaction.message.embeds[0]
         embed.add_field(name="Status", value=f"`✅` Kicked by {interaction.user.mention}", inline=False)
 
-        await interaction.edit_original_response(embed=embed, view=self)
+        await interaction.edit_original_response(embed=embed, view=None)
         await interaction.followup.send(success_msg, ephemeral=True)
 
         # Log the action in the database
-        await self.cog.log_alt_action(interaction.guild.id, self.user_id, "kicked", interaction.user.id)
+        await self.cog.log_alt_action(interaction.guild.id, user_id, "kicked", interaction.user.id)
 
-    @discord.ui.button(label="Ban", style=discord.ButtonStyle.danger, custom_id="ban_user")
+    @discord.ui.button(label="Ban", style=discord.ButtonStyle.danger, custom_id="alt_ban_user")
     async def ban_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
+        # Permission and maintenance gate
+        if not await _authorize(interaction):
             return
 
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
+        user_id, heat_score = self._alert_details(interaction.message)
 
         # Ban the user from this server
         try:
             await interaction.guild.ban(
-                discord.Object(id=self.user_id),
-                reason=f"LinkBot: Possible alt account (Heat Score: {self.heat_score})"
+                discord.Object(id=user_id),
+                reason=f"LinkBot: Possible alt account (Heat Score: {heat_score})"
             )
-            success_msg = f"User <@{self.user_id}> has been banned from the server."
+            success_msg = f"User <@{user_id}> has been banned from the server."
         except discord.Forbidden:
             success_msg = "I don't have permission to ban this user."
         except discord.HTTPException as e:
             success_msg = f"Failed to ban the user: {str(e)}"
 
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
+        # Update the message; drop the buttons since the alert is handled
         embed = interaction.message.embeds[0]
         embed.add_field(name="Status", value=f"`✅` Banned by {interaction.user.mention}", inline=False)
 
-        await interaction.edit_original_response(embed=embed, view=self)
+        await interaction.edit_original_response(embed=embed, view=None)
         await interaction.followup.send(success_msg, ephemeral=True)
 
         # Log the action in the database
-        await self.cog.log_alt_action(interaction.guild.id, self.user_id, "banned", interaction.user.id)
+        await self.cog.log_alt_action(interaction.guild.id, user_id, "banned", interaction.user.id)
 
-    @discord.ui.button(label="Dismiss", style=discord.ButtonStyle.success, custom_id="dismiss_alt_alert")
+    @discord.ui.button(label="Dismiss", style=discord.ButtonStyle.success, custom_id="alt_dismiss_alert")
     async def dismiss_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
+        # Permission and maintenance gate
+        if not await _authorize(interaction):
             return
 
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
-
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
+        user_id, _ = self._alert_details(interaction.message)
 
-        # Update the message
+        # Update the message; drop the buttons since the alert is handled
         embed = interaction.message.embeds[0]
         embed.add_field(name="Status", value=f"`✅` Dismissed by {interaction.user.mention}", inline=False)
 
-        await interaction.edit_original_response(embed=embed, view=self)
+        await interaction.edit_original_response(embed=embed, view=None)
         await interaction.followup.send("Alert dismissed. No action taken against the user.", ephemeral=True)
 
         # Log the action in the database
-        await self.cog.log_alt_action(interaction.guild.id, self.user_id, "dismissed", interaction.user.id)
-
-    async def on_timeout(self):
-        # Disable all buttons when the view times out (after 24 hours)
-        for item in self.children:
-            item.disabled = True
-
-        # We can't update the message here since we don't have a reference to it
-        # This will be handled by a background task that checks for expired views
+        await self.cog.log_alt_action(interaction.guild.id, user_id, "dismissed", interaction.user.id)
 
 class AltSettings(discord.ui.View):
     """View for configuring alt detection settings"""
@@ -155,282 +202,130 @@ class AltSettings(discord.ui.View):
         if "enabled" not in self.settings:
             self.settings["enabled"] = True
 
+        # Ensure the rules dict exists so the toggle handlers never have to
+        # check for it
+        self.settings.setdefault("rules", {})
+
         # Add threshold select menu on row 0
         threshold_select = ThresholdSelect(self.bot, self.guild_id, self.settings)
         threshold_select.row = 0
         self.add_item(threshold_select)
 
         # Set up button states/styles before adding them
-        self._init_button_states()
-
-    def _init_button_states(self):
+        self._apply_button_styles()
+
+    # Maps each toggle button's label to where its setting lives ("rules" or
+    # top-level), the setting key, and its default. Drives _apply_button_styles
+    # instead of an if/elif chain per button.
+    _BUTTON_SETTINGS = {
+        "Toggle New Account Rule": ("rules", "new_account", True),
+        "Toggle No Avatar Rule": ("rules", "no_avatar", True),
+        "Toggle Alt Name Rule": ("rules", "alt_name", True),
+        "Toggle Default Name Rule": ("rules", "default_name", True),
+        "Toggle Previous Ban Rule": ("rules", "previous_ban", True),
+        "Toggle Quick Join Rule": ("rules", "quick_join", True),
+        "Toggle Auto-Kick": (None, "auto_kick", False),
+        "Toggle Auto-Ban": (None, "auto_ban", False),
+    }
+
+    def _apply_button_styles(self):
+        """Sync every button's style/disabled state with the current settings"""
         system_enabled = self.settings.get("enabled", True)
-        for child in self.children:
-            if isinstance(child, discord.ui.Button):
-                if child.label == "Toggle Alt System":
-                    child.style = discord.ButtonStyle.blurple if system_enabled else discord.ButtonStyle.danger
-                    child.disabled = False
-                else:
-                    if not system_enabled:
-                        child.style = discord.ButtonStyle.secondary
-                        child.disabled = True
-                    else:
-                        child.disabled = False
-                        if child.label == "Toggle New Account Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("new_account", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle No Avatar Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("no_avatar", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Alt Name Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("alt_name", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Default Name Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("default_name", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Previous Ban Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("previous_ban", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Quick Join Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("quick_join", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Auto-Kick":
-                            child.style = discord.ButtonStyle.success if self.settings.get("auto_kick", False) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Auto-Ban":
-                            child.style = discord.ButtonStyle.success if self.settings.get("auto_ban", False) else discord.ButtonStyle.danger
-
-    @discord.ui.button(label="Toggle Alt System", style=discord.ButtonStyle.primary, row=1)
-    async def toggle_alt_system(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the enabled setting
-        current_setting = self.settings.get("enabled", True)
-        self.settings["enabled"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle New Account Rule", style=discord.ButtonStyle.primary, row=2)
-    async def toggle_new_account(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("new_account", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["new_account"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle No Avatar Rule", style=discord.ButtonStyle.primary, row=2)
-    async def toggle_no_avatar(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("no_avatar", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["no_avatar"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle Alt Name Rule", style=discord.ButtonStyle.primary, row=2)
-    async def toggle_alt_name(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("alt_name", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["alt_name"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle Default Name Rule", style=discord.ButtonStyle.primary, row=3)
-    async def toggle_default_name(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("default_name", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["default_name"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle Previous Ban Rule", style=discord.ButtonStyle.primary, row=3)
-    async def toggle_previous_ban(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("previous_ban", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["previous_ban"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle Quick Join Rule", style=discord.ButtonStyle.primary, row=3)
-    async def toggle_quick_join(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the rule
-        current_setting = self.settings.get("rules", {}).get("quick_join", True)
-        if "rules" not in self.settings:
-            self.settings["rules"] = {}
-        self.settings["rules"]["quick_join"] = not current_setting
-
-        # Save to DB
-        await self.save_settings(interaction)
-
-    @discord.ui.button(label="Toggle Auto-Kick", style=discord.ButtonStyle.primary, row=4)
-    async def toggle_auto_kick(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Toggle the setting
-        current_setting = self.settings.get("auto_kick", False)
-        self.settings["auto_kick"] = not current_setting
-
-        # If enabling auto-kick, disable auto-ban
-        if self.settings["auto_kick"]:
-            self.settings["auto_ban"] = False
+        rules = self.settings.get("rules", {})
 
-        # Save to DB
-        await self.save_settings(interaction)
+        for child in self.children:
+            if not isinstance(child, discord.ui.Button):
+                continue
+
+            if child.label == "Toggle Alt System":
+                child.style = discord.ButtonStyle.success if system_enabled else discord.ButtonStyle.danger
+                child.disabled = False
+            elif not system_enabled:
+                # If system is disabled, set all other buttons to gray and disable them
+                child.style = discord.ButtonStyle.secondary
+                child.disabled = True
+            else:
+                child.disabled = False
+                section, key, default = self._BUTTON_SETTINGS[child.label]
+                source = rules if section == "rules" else self.settings
+                child.style = discord.ButtonStyle.success if source.get(key, default) else discord.ButtonStyle.danger
+
+    def _make_toggle(label: str, row: int, section: Optional[str], key: str,
+                     default: bool, exclusive_with: Optional[str] = None):
+        """Build the handler for one toggle button.
+
+        The toggle buttons only differ in which settings flag they flip (and,
+        for the auto actions, which opposite flag they clear), so one factory
+        generates them all instead of nine copies of the same handler.
+        """
+
+        @discord.ui.button(label=label, style=discord.ButtonStyle.primary, row=row)
+        async def handler(self, button: discord.ui.Button, interaction: discord.Interaction):
+            # Permission and maintenance gate
+            if not await _authorize(interaction):
+                return
 
-    @discord.ui.button(label="Toggle Auto-Ban", style=discord.ButtonStyle.primary, row=4)
-    async def toggle_auto_ban(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
+            # Flip the flag
+            target = self.settings["rules"] if section == "rules" else self.settings
+            new_value = not target.get(key, default)
+            target[key] = new_value
 
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
+            # Auto-kick and auto-ban are mutually exclusive
+            if exclusive_with and new_value:
+                self.settings[exclusive_with] = False
 
-        # Toggle the setting
-        current_setting = self.settings.get("auto_ban", False)
-        self.settings["auto_ban"] = not current_setting
+            # Save to DB
+            await self.save_settings(interaction)
 
-        # If enabling auto-ban, disable auto-kick
-        if self.settings["auto_ban"]:
-            self.settings["auto_kick"] = False
+        return handler
 
-        # Save to DB
-        await self.save_settings(interaction)
+    toggle_alt_system = _make_toggle("Toggle Alt System", 1, None, "enabled", True)
+    toggle_new_account = _make_toggle("Toggle New Account Rule", 2, "rules", "new_account", True)
+    toggle_no_avatar = _make_toggle("Toggle No Avatar Rule", 2, "rules", "no_avatar", True)
+    toggle_alt_name = _make_toggle("Toggle Alt Name Rule", 2, "rules", "alt_name", True)
+    toggle_default_name = _make_toggle("Toggle Default Name Rule", 3, "rules", "default_name", True)
+    toggle_previous_ban = _make_toggle("Toggle Previous Ban Rule", 3, "rules", "previous_ban", True)
+    toggle_quick_join = _make_toggle("Toggle Quick Join Rule", 3, "rules", "quick_join", True)
+    toggle_auto_kick = _make_toggle("Toggle Auto-Kick", 4, None, "auto_kick", False, exclusive_with="auto_ban")
+    toggle_auto_ban = _make_toggle("Toggle Auto-Ban", 4, None, "auto_ban", False, exclusive_with="auto_kick")
 
     async def save_settings(self, interaction):
-        # Save settings to database
-        async with aiosqlite.connect("database.db") as db:
-            # Check if settings already exist
-            async with db.execute(
-                "SELECT settings FROM alt_settings WHERE server_id = ?",
-                (self.guild_id,)
-            ) as cursor:
-                existing = await cursor.fetchone()
-
-            if existing:
-                # Update existing settings
-                await db.execute(
-                    "UPDATE alt_settings SET settings = ? WHERE server_id = ?",
-                    (json.dumps(self.settings), self.guild_id)
-                )
-            else:
-                # Insert new settings
-                await db.execute(
-                    "INSERT INTO alt_settings (server_id, settings) VALUES (?, ?)",
-                    (self.guild_id, json.dumps(self.settings))
-                )
+        # Save settings to database through the cog's shared connection
+        cog = self.bot.get_cog("Alts")
+        db = await cog.get_db()
 
+        # Serialize once, then upsert in a single statement - no need for a
+        # separate existence check
+        settings_json = orjson.dumps(self.settings).decode()
+
+        # Serialize the write so concurrent toggles/joins don't pile up on the
+        # SQLite write lock
+        async with cog._write_lock:
+            await db.execute(
+                """
+                INSERT INTO alt_settings (server_id, settings) VALUES (?, ?)
+                ON CONFLICT(server_id) DO UPDATE SET settings = excluded.settings
+                """,
+                (self.guild_id, settings_json)
+            )
             await db.commit()
 
+        # Keep the cog's in-memory caches in sync so joins see the new settings
+        # without another SELECT
+        cog._settings_cache[self.guild_id] = (time.time(), self.settings)
+        cog._enabled_cache[self.guild_id] = self.settings.get("enabled", True)
+
         # Update the view with current settings
         await self.update_view(interaction)
 
     async def update_view(self, interaction):
-        # Check if the system is enabled
-        system_enabled = self.settings.get("enabled", True)
+        # Update button styles and disable state based on current settings,
+        # then push the refreshed panel to the message
+        self._apply_button_styles()
+        await interaction.edit_original_response(embed=self._build_embed(), view=self)
 
-        # Update button styles and disable state based on current settings
-        for child in self.children:
-            if isinstance(child, discord.ui.Button):
-                # Set the Toggle Alt System button style
-                if child.label == "Toggle Alt System":
-                    child.style = discord.ButtonStyle.success if system_enabled else discord.ButtonStyle.danger
-                    child.disabled = False
-                else:
-                    # If system is disabled, set all other buttons to gray and disable them
-                    if not system_enabled:
-                        child.style = discord.ButtonStyle.secondary
-                        child.disabled = True
-                    else:
-                        child.disabled = False
-                        # Otherwise, set button styles based on their settings
-                        if child.label == "Toggle New Account Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("new_account", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle No Avatar Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("no_avatar", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Alt Name Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("alt_name", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Default Name Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("default_name", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Previous Ban Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("previous_ban", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Quick Join Rule":
-                            child.style = discord.ButtonStyle.success if self.settings.get("rules", {}).get("quick_join", True) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Auto-Kick":
-                            child.style = discord.ButtonStyle.success if self.settings.get("auto_kick", False) else discord.ButtonStyle.danger
-                        elif child.label == "Toggle Auto-Ban":
-                            child.style = discord.ButtonStyle.success if self.settings.get("auto_ban", False) else discord.ButtonStyle.danger
-
-        # Create settings embed
+    def _build_embed(self):
+        """Build the settings panel embed from the current settings"""
         embed = discord.Embed(
             title="Alt Detection Settings",
             description="Configure the alt detection system for your server.",
@@ -479,8 +374,7 @@ class AltSettings(discord.ui.View):
             inline=False
         )
 
-        # Update the message
-        await interaction.edit_original_response(embed=embed, view=self)
+        return embed
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         # Only check permissions or other logic here, do not update the view/message
@@ -489,21 +383,28 @@ class AltSettings(discord.ui.View):
 class ThresholdSelect(discord.ui.Select):
     """Select menu for choosing the heat threshold"""
 
+    # Built once at import - opening the settings panel only copies these and
+    # flips the default flag instead of re-rendering 7 options each time
+    _THRESHOLDS = (50, 75, 100, 125, 150, 175, 200)
+    _OPTION_TEMPLATES = [
+        discord.SelectOption(
+            label=str(threshold),
+            value=str(threshold),
+            description=f"Set heat threshold to {threshold}",
+        )
+        for threshold in _THRESHOLDS
+    ]
+
     def __init__(self, bot, guild_id: int, settings: dict):
         self.bot = bot
         self.guild_id = guild_id
         self.settings = settings
 
-        # Create options for different thresholds
-        options = [
-            discord.SelectOption(
-                label=f"{threshold}",
-                value=f"{threshold}",
-                description=f"Set heat threshold to {threshold}",
-                default=(threshold == settings.get("threshold", 100))
-            )
-            for threshold in [50, 75, 100, 125, 150, 175, 200]
-        ]
+        # Copy the shared templates and mark the current threshold
+        current = str(settings.get("threshold", 100))
+        options = [copy.copy(option) for option in self._OPTION_TEMPLATES]
+        for option in options:
+            option.default = (option.value == current)
 
         super().__init__(
             placeholder="Select heat threshold",
@@ -514,12 +415,8 @@ class ThresholdSelect(discord.ui.Select):
         )
 
     async def callback(self, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
+        # Permission and maintenance gate
+        if not await _authorize(interaction):
             return
 
         # Update threshold setting
@@ -537,53 +434,109 @@ class Alts(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.recent_joins = {}  # guild_id -> list of (user_id, timestamp) tuples
-        self.check_expired_joins.start()
+        # guild_id -> ((user_id, ts) of the newest join,
+        #              (user_id, ts) of the newest join by a different user).
+        # That pair is everything the quick-join rule ever asks about, so no
+        # per-join history (or expiry of one) is needed.
+        self.recent_joins = {}
+        self.db = None  # Shared connection, opened lazily via get_db()
+        self._write_lock = asyncio.Lock()  # Only one writer at a time; reads stay lock-free under WAL
+        self._settings_cache = {}  # guild_id -> (fetch time, decoded alt settings dict)
+        self._prefs_cache = {}  # guild_id -> (fetch time, decoded server preferences dict)
+        self._enabled_cache = {}  # guild_id -> bool, gates the join pipeline early
+        self._dismissed_cache = OrderedDict()  # (guild_id, user_id) -> bool, LRU-bounded
+        self._action_buffer = []  # Pending alt_actions rows, flushed in batches
+
+        # One persistent alert view shared by every alert message - buttons
+        # keep working after a restart and no per-alert View sticks around
+        self.alert_view = AltDetectionView(self)
+        self.bot.add_view(self.alert_view)
+
+        self.flush_alt_actions.start()
 
     def cog_unload(self):
-        self.check_expired_joins.cancel()
+        self.flush_alt_actions.cancel()
+
+        # Write out any buffered actions, then close the shared connection
+        if self.db is not None:
+            db = self.db
+            self.db = None
+
+            async def _shutdown():
+                await self._flush_action_buffer(db)
+                await db.close()
+
+            self.bot.loop.create_task(_shutdown())
+
+    async def get_db(self):
+        """Get the shared database connection, opening it on first use.
+
+        Reopening the database file for every query re-parses the schema and
+        re-applies PRAGMAs each time, which adds up fast during join bursts.
+        Keeping one connection alive avoids all of that.
+        """
+        if self.db is None:
+            self.db = await aiosqlite.connect("database.db")
+            # Tune the connection once - WAL lets readers run alongside the writer
+            await self.db.executescript(
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=5000;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA cache_size=-64000;"
+                "PRAGMA mmap_size=268435456;"
+            )
+        return self.db
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Create necessary database tables on startup"""
-        async with aiosqlite.connect("database.db") as db:
-            # Create alt_settings table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS alt_settings (
-                    server_id INTEGER PRIMARY KEY,
-                    settings TEXT
-                )
-                """
+        db = await self.get_db()
+
+        # Create alt_settings table
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alt_settings (
+                server_id INTEGER PRIMARY KEY,
+                settings TEXT
             )
+            """
+        )
 
-            # Create alt_actions table for logging actions
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS alt_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    server_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    action TEXT NOT NULL,
-                    by_user_id INTEGER NOT NULL,
-                    timestamp REAL NOT NULL
-                )
-                """
+        # Create alt_actions table for logging actions
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alt_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                server_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                by_user_id INTEGER NOT NULL,
+                timestamp REAL NOT NULL
             )
+            """
+        )
 
-            # Create alt_dismissed table for tracking dismissed users
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS alt_dismissed (
-                    server_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    timestamp REAL NOT NULL,
-                    PRIMARY KEY (server_id, user_id)
-                )
-                """
+        # Create alt_dismissed table for tracking dismissed users
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alt_dismissed (
+                server_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (server_id, user_id)
             )
+            """
+        )
 
-            await db.commit()
+        # alt_actions is looked up by (server_id, user_id) but only has the
+        # implicit rowid index, so those lookups scan the whole history.
+        # alt_dismissed is already covered by its composite primary key.
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_alt_actions_server_user ON alt_actions (server_id, user_id, timestamp)"
+        )
+
+        await db.commit()
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -592,8 +545,14 @@ class Alts(commands.Cog):
         if member.bot:
             return
 
-        # Get server settings
-        settings = await self.get_server_settings(member.guild.id)
+        # Cheapest gate first: if we already know the system is off for this
+        # guild, skip the settings fetch and rule pipeline entirely
+        if self._enabled_cache.get(member.guild.id) is False:
+            return
+
+        # Get server settings, preferences, and the dismissed flag together -
+        # one round-trip instead of three
+        settings, preferences, dismissed = await self.fetch_join_context(member.guild.id, member.id)
 
         # If no settings found or threshold is 0, use defaults
         if not settings:
@@ -612,23 +571,26 @@ class Alts(commands.Cog):
                 "auto_ban": False
             }
 
-        # Check if the system is enabled
-        if not settings.get("enabled", True):
+        # Check if the system is enabled, remembering the answer so the next
+        # join for a disabled guild returns before touching settings at all
+        enabled = settings.get("enabled", True)
+        self._enabled_cache[member.guild.id] = enabled
+        if not enabled:
             return
 
         # Check if user was previously dismissed
-        if await self.is_user_dismissed(member.guild.id, member.id):
+        if dismissed:
             return
 
-        # Calculate heat score
+        # Calculate heat score - grab the clock once and reuse it below
+        now_ts = time.time()
         heat_score = 0
         triggered_rules = {}
         rules = settings.get("rules", {})
 
         # Rule 1: Account age < 7 days
         if rules.get("new_account", True):
-            account_age = (datetime.now(timezone.utc) - member.created_at).days
-            if account_age < 7:
+            if now_ts - member.created_at.timestamp() < 7 * 86400:
                 heat_score += 50
                 triggered_rules["new_account"] = 50
 
@@ -648,48 +610,40 @@ class Alts(commands.Cog):
 
         # Rule 4: Username matches Discord default pattern
         if rules.get("default_name", True):
-            if re.match(r'^[a-zA-Z]+\d{4}$', member.name):
+            if _DEFAULT_NAME_RE.match(member.name):
                 heat_score += 20
                 triggered_rules["default_name"] = 20
 
+        # Rules 5 and 6 hit the database, so only evaluate them while the
+        # verdict still depends on them - once the cheap rules alone cross the
+        # threshold the user is flagged either way, and triggered_rules only
+        # feeds the alert embed breakdown
+        threshold = settings.get("threshold", 100)
+
         # Rule 5: User was banned in the past under a different account with the same username
-        if rules.get("previous_ban", True):
+        if heat_score < threshold and rules.get("previous_ban", True):
             if await self.check_previous_ban_with_same_name(member.guild.id, member.id, member.name):
                 heat_score += 40
                 triggered_rules["previous_ban"] = 40
 
         # Rule 6: User joins within 2 minutes of another new account
-        if rules.get("quick_join", True):
+        if heat_score < threshold and rules.get("quick_join", True):
             if await self.check_quick_join(member.guild.id, member.id):
                 heat_score += 25
                 triggered_rules["quick_join"] = 25
 
-        # Add this join to recent joins
-        if member.guild.id not in self.recent_joins:
-            self.recent_joins[member.guild.id] = []
-        self.recent_joins[member.guild.id].append((member.id, time.time()))
+        # Remember this join for the quick-join rule: the newest join becomes
+        # current, and if it was made by someone else it also becomes the
+        # newest distinct join
+        newest, distinct = self.recent_joins.get(member.guild.id, (None, None))
+        if newest is not None and newest[0] != member.id:
+            distinct = newest
+        self.recent_joins[member.guild.id] = ((member.id, now_ts), distinct)
 
         # If heat score is below threshold, do nothing
-        threshold = settings.get("threshold", 100)
         if heat_score < threshold:
             return
 
-        # Get the server's preferences for alert channel
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT preferences FROM servers WHERE server_id = ?",
-                (member.guild.id,)
-            ) as cursor:
-                server_data = await cursor.fetchone()
-
-            if not server_data:
-                return
-
-            try:
-                preferences = json.loads(server_data[0]) if server_data[0] else {}
-            except json.JSONDecodeError:
-                preferences = {}
-
         # Get alert channel
         alert_channel_id = preferences.get("alert_channel_id")
         if not alert_channel_id:
@@ -699,36 +653,28 @@ class Alts(commands.Cog):
         if not alert_channel:
             return
 
-        # Check if auto-actions are enabled
+        # One timestamp and one copy of the shared field strings for every
+        # embed we might build below - the three variants only differ in
+        # title/description/color
+        now_utc = datetime.now(timezone.utc)
+        get_name = _RULE_NAMES.get
+        rules_text = "\n".join(f"• {get_name(rule, rule)}: +{points}" for rule, points in triggered_rules.items())
+        user_info_value = (
+            f"**ID:** {member.id}\n"
+            f"**Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S')} ({(now_utc - member.created_at).days} days ago)"
+        )
+
+        # Attempt the automatic action first, then build a single embed for
+        # whichever outcome we ended up with - the three variants only differ
+        # in title, description, and color
+        action = None
         if settings.get("auto_kick", False):
             try:
                 await member.kick(reason=f"LinkBot: Possible alt account (Heat Score: {heat_score})")
-                # Create embed for the auto-kick notification
-                embed = discord.Embed(
-                    title="⚠️ Auto-Kick Alert",
-                    description=f"User {member.mention} was automatically kicked as a possible alt account.",
-                    color=discord.Color.orange(),
-                    timestamp=datetime.now(timezone.utc)
-                )
-                embed.add_field(name="Heat Score", value=f"{heat_score}/{threshold}", inline=False)
-
-                # Add triggered rules
-                rules_text = "\n".join([f"• {self.get_rule_name(rule)}: +{points}" for rule, points in triggered_rules.items()])
-                embed.add_field(name="Triggered Rules", value=rules_text, inline=False)
-
-                # Add user info
-                embed.add_field(
-                    name="User Info",
-                    value=f"**ID:** {member.id}\n**Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S')} ({(datetime.now(timezone.utc) - member.created_at).days} days ago)",
-                    inline=False
-                )
-
-                # Send notification to alert channel
-                await alert_channel.send(embed=embed)
-
-                # Log the action
-                await self.log_alt_action(member.guild.id, member.id, "auto-kicked", self.bot.user.id)
-                return
+                action = "auto-kicked"
+                title = "⚠️ Auto-Kick Alert"
+                description = f"User {member.mention} was automatically kicked as a possible alt account."
+                color = discord.Color.orange()
             except (discord.Forbidden, discord.HTTPException):
                 # If auto-kick fails, fall back to sending an alert
                 pass
@@ -738,177 +684,213 @@ class Alts(commands.Cog):
                     member,
                     reason=f"LinkBot: Possible alt account (Heat Score: {heat_score})"
                 )
-                # Create embed for the auto-ban notification
-                embed = discord.Embed(
-                    title="⚠️ Auto-Ban Alert",
-                    description=f"User {member.mention} was automatically banned as a possible alt account.",
-                    color=discord.Color.red(),
-                    timestamp=datetime.now(timezone.utc)
-                )
-                embed.add_field(name="Heat Score", value=f"{heat_score}/{threshold}", inline=False)
-
-                # Add triggered rules
-                rules_text = "\n".join([f"• {self.get_rule_name(rule)}: +{points}" for rule, points in triggered_rules.items()])
-                embed.add_field(name="Triggered Rules", value=rules_text, inline=False)
-
-                # Add user info
-                embed.add_field(
-                    name="User Info",
-                    value=f"**ID:** {member.id}\n**Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S')} ({(datetime.now(timezone.utc) - member.created_at).days} days ago)",
-                    inline=False
-                )
-
-                # Send notification to alert channel
-                await alert_channel.send(embed=embed)
-
-                # Log the action
-                await self.log_alt_action(member.guild.id, member.id, "auto-banned", self.bot.user.id)
-                return
+                action = "auto-banned"
+                title = "⚠️ Auto-Ban Alert"
+                description = f"User {member.mention} was automatically banned as a possible alt account."
+                color = discord.Color.red()
             except (discord.Forbidden, discord.HTTPException):
                 # If auto-ban fails, fall back to sending an alert
                 pass
 
-        # Create embed for the alt alert
-        embed = discord.Embed(
-            title="⚠️ Possible Alt Account Detected",
-            description=f"User {member.mention} has been flagged as a possible alt account.",
-            color=discord.Color.gold(),
-            timestamp=datetime.now(timezone.utc)
-        )
-        embed.add_field(name="Heat Score", value=f"{heat_score}/{threshold}", inline=False)
+        if action is None:
+            title = "⚠️ Possible Alt Account Detected"
+            description = f"User {member.mention} has been flagged as a possible alt account."
+            color = discord.Color.gold()
 
-        # Add triggered rules
-        rules_text = "\n".join([f"• {self.get_rule_name(rule)}: +{points}" for rule, points in triggered_rules.items()])
+        embed = discord.Embed(title=title, description=description, color=color, timestamp=now_utc)
+        embed.add_field(name="Heat Score", value=f"{heat_score}/{threshold}", inline=False)
         embed.add_field(name="Triggered Rules", value=rules_text, inline=False)
+        embed.add_field(name="User Info", value=user_info_value, inline=False)
 
-        # Add user info
-        embed.add_field(
-            name="User Info",
-            value=f"**ID:** {member.id}\n**Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S')} ({(datetime.now(timezone.utc) - member.created_at).days} days ago)",
-            inline=False
-        )
-
-        # Create view with Kick, Ban, and Dismiss buttons
-        view = AltDetectionView(member.id, heat_score, triggered_rules, self)
+        if action is not None:
+            # Notify the alert channel and log what the bot did
+            await alert_channel.send(embed=embed)
+            await self.log_alt_action(member.guild.id, member.id, action, self.bot.user.id)
+            return
 
-        # Send the alert, pinging the role if specified
+        # Send the alert with the shared Kick/Ban/Dismiss view, pinging the
+        # role if specified
         ping_role_id = preferences.get("ping_role_id")
         content = f"<@&{ping_role_id}>" if ping_role_id else None
-        await alert_channel.send(content=content, embed=embed, view=view)
-
-    @tasks.loop(minutes=10)
-    async def check_expired_joins(self):
-        """Remove joins older than 10 minutes from the recent_joins dict"""
-        current_time = time.time()
-        for guild_id in list(self.recent_joins.keys()):
-            self.recent_joins[guild_id] = [
-                (user_id, timestamp) for user_id, timestamp in self.recent_joins[guild_id]
-                if current_time - timestamp < 600  # 10 minutes
-            ]
-            # If no recent joins left, remove the guild from the dict
-            if not self.recent_joins[guild_id]:
-                del self.recent_joins[guild_id]
-
-    @check_expired_joins.before_loop
-    async def before_check_expired_joins(self):
-        """Wait until the bot is ready before starting the task"""
-        await self.bot.wait_until_ready()
+        await alert_channel.send(content=content, embed=embed, view=self.alert_view)
 
     async def get_server_settings(self, guild_id: int) -> dict:
         """Get alt detection settings for a server"""
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT settings FROM alt_settings WHERE server_id = ?",
-                (guild_id,)
-            ) as cursor:
-                data = await cursor.fetchone()
+        # Served from memory while fresh - joins hit this on every member, so
+        # going to SQLite each time adds up fast
+        cached = self._cache_get(self._settings_cache, guild_id)
+        if cached is not None:
+            return cached
 
-            if not data:
-                return None
+        db = await self.get_db()
+        async with db.execute(_SQL_GET_SETTINGS, (guild_id,)) as cursor:
+            data = await cursor.fetchone()
 
+        if not data:
+            return None
+
+        try:
+            settings = orjson.loads(data[0])
+        except orjson.JSONDecodeError:
+            return None
+
+        self._settings_cache[guild_id] = (time.time(), settings)
+        return settings
+
+    async def fetch_join_context(self, guild_id: int, user_id: int) -> Tuple[Optional[dict], dict, bool]:
+        """Get alt settings, server preferences, and the dismissed flag in a
+        single round-trip.
+
+        The join path needs all three, and every query is a hop onto
+        aiosqlite's worker thread and back - so on a cache miss we fetch them
+        with one statement instead of three.
+        """
+        settings = self._cache_get(self._settings_cache, guild_id)
+        preferences = self._cache_get(self._prefs_cache, guild_id)
+        key = (guild_id, user_id)
+        dismissed = self._dismissed_cache.get(key)
+        if dismissed is not None:
+            self._dismissed_cache.move_to_end(key)
+        if settings is not None and preferences is not None and dismissed is not None:
+            return settings, preferences, dismissed
+
+        db = await self.get_db()
+        async with db.execute(_SQL_FETCH_JOIN_CONTEXT, (guild_id, user_id)) as cursor:
+            settings_json, prefs_json, dismissed_flag = await cursor.fetchone()
+
+        if dismissed is None:
+            dismissed = bool(dismissed_flag)
+            self._dismissed_cache[key] = dismissed
+            if len(self._dismissed_cache) > self._DISMISSED_CACHE_MAX:
+                self._dismissed_cache.popitem(last=False)
+
+        if settings is None and settings_json:
+            try:
+                settings = orjson.loads(settings_json)
+                self._settings_cache[guild_id] = (time.time(), settings)
+            except orjson.JSONDecodeError:
+                settings = None
+
+        if preferences is None:
             try:
-                return json.loads(data[0])
-            except json.JSONDecodeError:
-                return None
+                preferences = orjson.loads(prefs_json) if prefs_json else {}
+            except orjson.JSONDecodeError:
+                preferences = {}
+            self._prefs_cache[guild_id] = (time.time(), preferences)
+
+        return settings, preferences, dismissed
 
     async def check_previous_ban_with_same_name(self, guild_id: int, user_id: int, username: str) -> bool:
-        """Check if a user with the same username was banned in this server before"""
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                """
-                SELECT b.id FROM bans b
-                JOIN ban_actions ba ON b.id = ba.ban_id
-                WHERE b.origin_server_id = ? AND b.user_id != ? AND ba.action = 'Accepted'
-                """,
-                (guild_id, user_id)
-            ) as cursor:
-                ban_records = await cursor.fetchall()
+        """Check if a user with the same username was banned in this server before.
 
-            if not ban_records:
-                return False
+        Bans recorded before usernames were stored have a NULL username and
+        never match, which is the safe default.
+        """
+        db = await self.get_db()
+        async with db.execute(_SQL_PREVIOUS_BAN_SAME_NAME, (guild_id, user_id, username)) as cursor:
+            (has_match,) = await cursor.fetchone()
 
-            # For each ban record, check if the banned user had the same username
-            # This would require storing usernames in the bans table, which we don't currently do
-            # For now, we'll return False, but this could be implemented in the future
-            return False
+        return bool(has_match)
 
     async def check_quick_join(self, guild_id: int, user_id: int) -> bool:
         """Check if a user joined within 2 minutes of another new account"""
-        if guild_id not in self.recent_joins:
-            return False
-
-        current_time = time.time()
-        for other_user_id, timestamp in self.recent_joins[guild_id]:
-            if other_user_id != user_id and current_time - timestamp < 120:  # 2 minutes
-                return True
-
-        return False
-
-    async def is_user_dismissed(self, guild_id: int, user_id: int) -> bool:
-        """Check if a user was previously dismissed"""
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT timestamp FROM alt_dismissed WHERE server_id = ? AND user_id = ?",
-                (guild_id, user_id)
-            ) as cursor:
-                data = await cursor.fetchone()
-
-            return data is not None
+        newest, distinct = self.recent_joins.get(guild_id, (None, None))
+
+        # The most recent join by someone else decides the rule: that's the
+        # newest join outright, unless the newest join belongs to this same
+        # user, in which case it's the newest distinct one
+        other = newest if newest is not None and newest[0] != user_id else distinct
+        return other is not None and time.time() - other[1] < 120  # 2 minutes
+
+    # Cap on remembered dismissed lookups before the oldest entries get evicted
+    _DISMISSED_CACHE_MAX = 10_000
+
+    # Buffered action rows that force a flush before the next timer tick
+    _ACTION_FLUSH_THRESHOLD = 64
+
+    # How long cached settings/preferences stay fresh. Settings change at
+    # human speed (admin panel clicks), so 60s of staleness is fine and keeps
+    # join bursts off the database entirely.
+    _CACHE_TTL = 60.0
+
+    def _cache_get(self, cache: dict, guild_id: int):
+        """Return a cached value if it's still within the TTL, else None"""
+        entry = cache.get(guild_id)
+        if entry is not None and time.time() - entry[0] < self._CACHE_TTL:
+            return entry[1]
+        return None
+
+    def invalidate_guild(self, guild_id: int):
+        """Drop a guild's cached settings so the next join reloads them.
+
+        The panel keeps these caches current itself, but the setup wizard
+        (and guild removal) write alt_settings and preferences straight to
+        the database - the enabled gate has no TTL, so without this a guild
+        re-enabled via /setup would stay gated off until a restart.
+        """
+        self._settings_cache.pop(guild_id, None)
+        self._prefs_cache.pop(guild_id, None)
+        self._enabled_cache.pop(guild_id, None)
+        for key in [key for key in self._dismissed_cache if key[0] == guild_id]:
+            del self._dismissed_cache[key]
 
     async def log_alt_action(self, guild_id: int, user_id: int, action: str, by_user_id: int):
         """Log an action taken on a possible alt account"""
-        async with aiosqlite.connect("database.db") as db:
-            await db.execute(
-                """
-                INSERT INTO alt_actions (server_id, user_id, action, by_user_id, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (guild_id, user_id, action, by_user_id, time.time())
-            )
+        # Buffer the log row - the flusher batches these into one transaction,
+        # which matters when auto-kick fires once per join during a raid
+        self._action_buffer.append((guild_id, user_id, action, by_user_id, time.time()))
+
+        # If action is "dismissed", record it right away since the join path
+        # reads this table on the next join
+        if action == "dismissed":
+            db = await self.get_db()
+            async with self._write_lock:
+                await db.execute(_SQL_INSERT_DISMISSED, (guild_id, user_id, time.time()))
+                await db.commit()
+
+            # Make sure the next join sees the dismissal without a SELECT
+            self._dismissed_cache[(guild_id, user_id)] = True
+
+        # Don't let the buffer grow unbounded between flusher ticks
+        if len(self._action_buffer) > self._ACTION_FLUSH_THRESHOLD:
+            await self._flush_action_buffer(await self.get_db())
+
+    async def _flush_action_buffer(self, db):
+        """Write all buffered alt_actions rows in a single transaction"""
+        if not self._action_buffer:
+            return
 
-            # If action is "dismissed", add to dismissed users
-            if action == "dismissed":
-                await db.execute(
-                    """
-                    INSERT OR REPLACE INTO alt_dismissed (server_id, user_id, timestamp)
-                    VALUES (?, ?, ?)
-                    """,
-                    (guild_id, user_id, time.time())
-                )
+        rows = self._action_buffer
+        self._action_buffer = []
+        try:
+            async with self._write_lock:
+                await db.executemany(_SQL_INSERT_ACTIONS, rows)
+                await db.commit()
+        except Exception:
+            # Re-prepend the batch (keeping log order ahead of anything
+            # buffered since) so the next tick retries instead of dropping it
+            self._action_buffer[:0] = rows
+            raise
+
+    @tasks.loop(seconds=2.0)
+    async def flush_alt_actions(self):
+        """Periodically flush buffered action logs to the database"""
+        if self._action_buffer:
+            # A transient DB error must only cost this flush - an uncaught
+            # exception would stop the loop and strand the buffer forever
+            try:
+                await self._flush_action_buffer(await self.get_db())
+            except Exception as e:
+                print(f"Error flushing alt actions: {e}")
 
-            await db.commit()
+    @flush_alt_actions.before_loop
+    async def before_flush_alt_actions(self):
+        """Wait until the bot is ready before starting the task"""
+        await self.bot.wait_until_ready()
 
     def get_rule_name(self, rule_key: str) -> str:
         """Get a human-readable name for a rule key"""
-        rule_names = {
-            "new_account": "Account age < 7 days",
-            "no_avatar": "No avatar",
-            "alt_name": "Username/display name contains 'alt'",
-            "default_name": "Username matches Discord default pattern",
-            "previous_ban": "Previously banned under different account with same username",
-            "quick_join": "Joined within 2 minutes of another new account"
-        }
-        return rule_names.get(rule_key, rule_key)
+        return _RULE_NAMES.get(rule_key, rule_key)
 
     async def alt_settings(self, interaction):
         """Show the alt detection settings panel (for dashboard integration)"""
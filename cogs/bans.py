@@ -1,743 +1,931 @@
-import json
-import time
-import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-
-import aiosqlite
-import discord
-from discord.ext import commands, tasks
-
-from cogs.systems import preChecks
-
-class BanRateLimit:
-    """Prevents servers from spamming ban alerts"""
-
-    def __init__(self, max_bans: int = 5, time_window: int = 180):
-        self.max_bans = max_bans  # Max bans allowed in the time period
-        self.time_window = time_window  # Time window in seconds (3 minutes default)
-        self.server_bans: Dict[int, List[float]] = {}  # Tracks when each server sent ban alerts
-
-    def can_send_alert(self, server_id: int) -> bool:
-        """Checks if a server is rate-limited or can send another ban alert"""
-        current_time = time.time()
-
-        # First time seeing this server? Initialize it
-        if server_id not in self.server_bans:
-            self.server_bans[server_id] = []
-
-        # Clean up old timestamps - only keep recent ones
-        self.server_bans[server_id] = [
-            ts for ts in self.server_bans[server_id] 
-            if current_time - ts < self.time_window
-        ]
-
-        # If they haven't hit the limit yet, let them send another
-        if len(self.server_bans[server_id]) < self.max_bans:
-            self.server_bans[server_id].append(current_time)
-            return True
-
-        # Too many bans, they need to wait
-        return False
-
-class BanAlertView(discord.ui.View):
-    """The UI with Accept/Dismiss buttons for ban alerts"""
-
-    def __init__(self, ban_id: int, user_id: int, origin_server_id: int, ban_reason: str, cog):
-        super().__init__(timeout=86400)  # Buttons expire after 24 hours
-        self.ban_id = ban_id
-        self.user_id = user_id  # The banned user
-        self.origin_server_id = origin_server_id  # Server that issued the ban
-        self.ban_reason = ban_reason
-        self.cog = cog
-        self.expiry_time = datetime.now() + timedelta(hours=24)  # For tracking when buttons should disable
-
-    @discord.ui.button(label="Accept", style=discord.ButtonStyle.green, emoji="✅", custom_id="accept_ban")
-    async def accept_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
-
-        # Update the ban status and increase origin server's integrity
-        async with aiosqlite.connect("database.db") as db:
-            # Update ban status
-            await db.execute(
-                "UPDATE bans SET status = ? WHERE id = ?",
-                ("Accepted", self.ban_id)
-            )
-
-            # Increase origin server's integrity (max 100)
-            await db.execute(
-                """
-                UPDATE servers 
-                SET integrity = MIN(integrity + 1, 100) 
-                WHERE server_id = ?
-                """,
-                (self.origin_server_id,)
-            )
-
-            # Log the action
-            await db.execute(
-                """
-                INSERT INTO ban_actions (ban_id, action, by_user_id, timestamp)
-                VALUES (?, ?, ?, ?)
-                """,
-                (self.ban_id, "Accepted", interaction.user.id, datetime.now().timestamp())
-            )
-
-            await db.commit()
-
-        # Ban the user in this server
-        try:
-            await interaction.guild.ban(
-                discord.Object(id=self.user_id), 
-                reason=f"LinkBot: Ban accepted from server {self.origin_server_id}. Original reason: {self.ban_reason}"
-            )
-            success_msg = f"User <@{self.user_id}> has been banned in this server."
-        except discord.Forbidden:
-            success_msg = "I don't have permission to ban this user."
-        except discord.HTTPException:
-            success_msg = "Failed to ban the user. They may have already left or been banned."
-
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
-        embed = interaction.message.embeds[0]
-        embed.add_field(name="Status", value=f"✅ Accepted by {interaction.user.mention}", inline=False)
-
-        await interaction.edit_original_response(embed=embed, view=self)
-        await interaction.followup.send(success_msg, ephemeral=True)
-
-    @discord.ui.button(label="Dismiss", style=discord.ButtonStyle.red, emoji="❌", custom_id="dismiss_ban")
-    async def dismiss_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
-
-        # Update the ban status and decrease origin server's integrity
-        async with aiosqlite.connect("database.db") as db:
-            # Update ban status
-            await db.execute(
-                "UPDATE bans SET status = ? WHERE id = ?",
-                ("Dismissed", self.ban_id)
-            )
-
-            # Decrease origin server's integrity (min 0)
-            await db.execute(
-                """
-                UPDATE servers 
-                SET integrity = MAX(integrity - 1, 0) 
-                WHERE server_id = ?
-                """,
-                (self.origin_server_id,)
-            )
-
-            # Log the action
-            await db.execute(
-                """
-                INSERT INTO ban_actions (ban_id, action, by_user_id, timestamp)
-                VALUES (?, ?, ?, ?)
-                """,
-                (self.ban_id, "Dismissed", interaction.user.id, datetime.now().timestamp())
-            )
-
-            await db.commit()
-
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
-        embed = interaction.message.embeds[0]
-        embed.add_field(name="Status", value=f"❌ Dismissed by {interaction.user.mention}", inline=False)
-
-        await interaction.edit_original_response(embed=embed, view=self)
-        await interaction.followup.send("Ban alert dismissed.", ephemeral=True)
-
-    async def on_timeout(self):
-        # Disable all buttons when the view times out (after 24 hours)
-        for item in self.children:
-            item.disabled = True
-
-        # We can't update the message here since we don't have a reference to it
-        # This will be handled by a background task that checks for expired views
-
-class JoinAlertView(discord.ui.View):
-    """UI with Ban/Dismiss buttons for when previously banned users join"""
-
-    def __init__(self, user_id: int, ban_records: List[dict], cog):
-        super().__init__(timeout=86400)  # Buttons expire after 24 hours
-        self.user_id = user_id  # The user who joined
-        self.ban_records = ban_records  # List of ban records for this user
-        self.cog = cog
-        self.expiry_time = datetime.now() + timedelta(hours=24)
-
-    @discord.ui.button(label="Ban", style=discord.ButtonStyle.red, emoji="🔨", custom_id="ban_user")
-    async def ban_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
-
-        # Ban the user in this server
-        try:
-            # Get the most recent ban reason from the records
-            most_recent_ban = max(self.ban_records, key=lambda x: x["flagged_at"])
-            ban_reason = most_recent_ban["ban_reason"]
-
-            await interaction.guild.ban(
-                discord.Object(id=self.user_id),
-                reason=f"LinkBot: User was previously banned in other servers. Most recent reason: {ban_reason}"
-            )
-            success_msg = f"User <@{self.user_id}> has been banned in this server."
-        except discord.Forbidden:
-            success_msg = "I don't have permission to ban this user."
-        except discord.HTTPException:
-            success_msg = "Failed to ban the user. They may have already left or been banned."
-
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
-        embed = interaction.message.embeds[0]
-        embed.add_field(name="Status", value=f"🔨 Banned by {interaction.user.mention}", inline=False)
-
-        await interaction.edit_original_response(embed=embed, view=self)
-        await interaction.followup.send(success_msg, ephemeral=True)
-
-    @discord.ui.button(label="Dismiss", style=discord.ButtonStyle.green, emoji="✓", custom_id="dismiss_join_alert")
-    async def dismiss_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        # Defer the response to prevent timeouts
-        await interaction.response.defer(ephemeral=True)
-
-        # Check if we're in maintenance mode
-        check = await preChecks(interaction)
-        if check is True:
-            return
-
-        # Check if the user has admin permissions
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
-            return
-
-        # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-
-        # Update the message
-        embed = interaction.message.embeds[0]
-        embed.add_field(name="Status", value=f"✓ Dismissed by {interaction.user.mention}", inline=False)
-
-        await interaction.edit_original_response(embed=embed, view=self)
-        await interaction.followup.send("Alert dismissed. No action taken against the user.", ephemeral=True)
-
-    async def on_timeout(self):
-        # Disable all buttons when the view times out (after 24 hours)
-        for item in self.children:
-            item.disabled = True
-
-        # We can't update the message here since we don't have a reference to it
-        # This will be handled by a background task that checks for expired views
-
-class Bans(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-        self.rate_limiter = BanRateLimit()
-        self.check_expired_views.start()
-
-    def cog_unload(self):
-        self.check_expired_views.cancel()
-
-    @commands.Cog.listener()
-    async def on_member_join(self, member):
-        """Check if a joining user was previously banned in other servers"""
-        # Skip bots
-        if member.bot:
-            return
-
-        # Query the database for ban records for this user
-        async with aiosqlite.connect("database.db") as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                """
-                SELECT b.*, s.integrity, s.server_id 
-                FROM bans b
-                JOIN servers s ON b.origin_server_id = s.server_id
-                WHERE b.user_id = ? AND b.status = 'Accepted'
-                ORDER BY b.flagged_at DESC
-                """,
-                (member.id,)
-            ) as cursor:
-                ban_records = await cursor.fetchall()
-
-        # If no ban records found, do nothing
-        if not ban_records:
-            return
-
-        # Get the server's preferences
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT preferences FROM servers WHERE server_id = ?",
-                (member.guild.id,)
-            ) as cursor:
-                server_data = await cursor.fetchone()
-
-            if not server_data:
-                return
-
-            try:
-                preferences = json.loads(server_data[0]) if server_data[0] else {}
-            except json.JSONDecodeError:
-                preferences = {}
-
-        # Get alert channel
-        alert_channel_id = preferences.get("alert_channel_id")
-        if not alert_channel_id:
-            return
-
-        alert_channel = member.guild.get_channel(alert_channel_id)
-        if not alert_channel:
-            return
-
-        # Create embed for the join alert
-        embed = discord.Embed(
-            title="⚠️ Previously Banned User Joined",
-            description=f"User {member.mention} has joined this server but has been banned in {len(ban_records)} other server(s).",
-            color=discord.Color.gold(),
-            timestamp=datetime.now()
-        )
-
-        # Add information about the most recent ban
-        most_recent_ban = ban_records[0]
-        server = self.bot.get_guild(most_recent_ban["origin_server_id"])
-        server_name = server.name if server else f"Unknown Server ({most_recent_ban['origin_server_id']})"
-
-        embed.add_field(
-            name="Most Recent Ban",
-            value=f"**Server:** {server_name} (Integrity: {most_recent_ban['integrity']})\n"
-                  f"**Reason:** {most_recent_ban['ban_reason']}\n"
-                  f"**Date:** {datetime.fromtimestamp(most_recent_ban['flagged_at']).strftime('%Y-%m-%d %H:%M:%S')}",
-            inline=False
-        )
-
-        # Add total ban count
-        embed.add_field(
-            name="Ban History",
-            value=f"This user has been banned in {len(ban_records)} server(s). Use `/search {member.mention}` for details.",
-            inline=False
-        )
-
-        # Create view with Ban and Dismiss buttons
-        view = JoinAlertView(member.id, ban_records, self)
-
-        # Send the alert, pinging the role if specified
-        ping_role_id = preferences.get("ping_role_id")
-        content = f"<@&{ping_role_id}>" if ping_role_id else None
-        try:
-            await alert_channel.send(content=content, embed=embed, view=view)
-        except discord.errors.Forbidden:
-            # Bot doesn't have permission to send messages in this channel
-            print(f"Missing permissions to send join alert in channel {alert_channel.id} in guild {member.guild.id}")
-        except Exception as e:
-            # Log any other errors that might occur
-            print(f"Error sending join alert: {e}")
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        async with aiosqlite.connect("database.db") as db:
-            # Create bans table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS bans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    origin_server_id INTEGER NOT NULL,
-                    flagged_by INTEGER NOT NULL,
-                    ban_reason TEXT,
-                    flagged_at REAL NOT NULL,
-                    status TEXT DEFAULT 'Pending'
-                )
-                """
-            )
-
-            # Create ban_actions table for logging accept/dismiss actions
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS ban_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ban_id INTEGER NOT NULL,
-                    action TEXT NOT NULL,
-                    by_user_id INTEGER NOT NULL,
-                    timestamp REAL NOT NULL,
-                    FOREIGN KEY (ban_id) REFERENCES bans (id)
-                )
-                """
-            )
-
-            await db.commit()
-
-    @commands.Cog.listener()
-    async def on_member_ban(self, guild, user):
-        # Check if the guild is blacklisted
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT blacklisted FROM servers WHERE server_id = ?",
-                (guild.id,)
-            ) as cursor:
-                server_data = await cursor.fetchone()
-
-            # If server doesn't exist in DB or is blacklisted, ignore the ban
-            if not server_data or server_data[0]:
-                return
-
-        # Wait for audit log to contain the ban reason
-        ban_reason = None
-        moderator_id = None
-
-        # Try to get the ban reason from audit logs
-        try:
-            await asyncio.sleep(2)  # Wait for audit log to be updated
-            async for entry in guild.audit_logs(limit=5, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    ban_reason = entry.reason
-                    moderator_id = entry.user.id
-                    break
-        except discord.Forbidden:
-            # Bot doesn't have permission to view audit logs
-            return
-
-        # If no reason is found, ignore this ban
-        if not ban_reason:
-            return
-
-        # Ignore bans issued by the bot itself
-        if moderator_id == self.bot.user.id:
-            return
-
-        # Check rate limit
-        if not self.rate_limiter.can_send_alert(guild.id):
-            return
-
-        # Check if an alert has already been sent for this user from any server recently
-        current_time = datetime.now().timestamp()
-        time_threshold = current_time - 300  # 5 minutes ago
-
-        async with aiosqlite.connect("database.db") as db:
-            # First check if an alert has already been sent for this user from this server recently
-            async with db.execute(
-                """
-                SELECT id FROM bans 
-                WHERE user_id = ? AND origin_server_id = ? AND flagged_at > ?
-                """,
-                (user.id, guild.id, time_threshold)
-            ) as cursor:
-                existing_ban_from_this_server = await cursor.fetchone()
-
-            # If an alert has already been sent from this server recently, ignore this ban
-            if existing_ban_from_this_server:
-                return
-
-            # Then check if an alert has already been sent for this user from any server recently
-            async with db.execute(
-                """
-                SELECT id FROM bans 
-                WHERE user_id = ? AND flagged_at > ?
-                """,
-                (user.id, time_threshold)
-            ) as cursor:
-                existing_ban_from_any_server = await cursor.fetchone()
-
-            # If an alert has already been sent from any server recently, ignore this ban
-            if existing_ban_from_any_server:
-                return
-
-        # Record the ban in the database
-        async with aiosqlite.connect("database.db") as db:
-            cursor = await db.execute(
-                """
-                INSERT INTO bans (user_id, origin_server_id, flagged_by, ban_reason, flagged_at, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (user.id, guild.id, moderator_id, ban_reason, current_time, "Pending")
-            )
-            ban_id = cursor.lastrowid
-            await db.commit()
-
-        # Get the origin server's integrity
-        async with aiosqlite.connect("database.db") as db:
-            async with db.execute(
-                "SELECT integrity FROM servers WHERE server_id = ?",
-                (guild.id,)
-            ) as cursor:
-                server_data = await cursor.fetchone()
-
-            if not server_data:
-                # If server doesn't exist in DB, add it with default values
-                await db.execute(
-                    "INSERT INTO servers (server_id, integrity) VALUES (?, ?)",
-                    (guild.id, 100)
-                )
-                await db.commit()
-                integrity = 100
-            else:
-                integrity = server_data[0]
-
-        # Send ban alerts to other servers
-        await self.send_ban_alerts(ban_id, user.id, guild.id, guild.name, integrity, ban_reason, moderator_id)
-
-    async def send_ban_alerts(self, ban_id, user_id, origin_server_id, origin_server_name, 
-                             integrity, ban_reason, moderator_id):
-        # Get all servers where the bot is present
-        for guild in self.bot.guilds:
-            # Skip the origin server
-            if guild.id == origin_server_id:
-                continue
-
-            # Check if this server is in the database and not blacklisted
-            async with aiosqlite.connect("database.db") as db:
-                async with db.execute(
-                    "SELECT preferences, blacklisted FROM servers WHERE server_id = ?",
-                    (guild.id,)
-                ) as cursor:
-                    server_data = await cursor.fetchone()
-
-                # If server is not in DB or is blacklisted, skip it
-                if not server_data or server_data[1]:
-                    continue
-
-                # Parse preferences
-                try:
-                    preferences = json.loads(server_data[0]) if server_data[0] else {}
-                except json.JSONDecodeError:
-                    preferences = {}
-
-                # Check if this server has blocked the origin server
-                blocked_servers = preferences.get("blocked_servers", [])
-                if origin_server_id in blocked_servers:
-                    continue
-
-                # Check auto-ban setting
-                auto_ban = preferences.get("auto_ban", False)
-
-                # Get alert channel
-                alert_channel_id = preferences.get("alert_channel_id")
-                if not alert_channel_id:
-                    continue
-
-                alert_channel = guild.get_channel(alert_channel_id)
-                if not alert_channel:
-                    continue
-
-                # Check if we should auto-ban or send alert
-                if auto_ban and integrity >= 50:
-                    # Auto-ban the user
-                    try:
-                        await guild.ban(
-                            discord.Object(id=user_id), 
-                            reason=f"LinkBot: Auto-ban from server {origin_server_name} (ID: {origin_server_id}). Original reason: {ban_reason}"
-                        )
-
-                        # Create embed for the auto-ban notification
-                        embed = discord.Embed(
-                            title="⚠️ Auto-Ban Alert",
-                            description=f"User <@{user_id}> was automatically banned based on a ban from another server.",
-                            color=discord.Color.red(),
-                            timestamp=datetime.now()
-                        )
-                        embed.add_field(name="Origin Server", value=f"{origin_server_name} (Integrity: {integrity})", inline=False)
-                        embed.add_field(name="Ban Reason", value=ban_reason or "No reason provided", inline=False)
-
-                        # Update ban status to Accepted
-                        async with aiosqlite.connect("database.db") as db:
-                            await db.execute(
-                                "UPDATE bans SET status = ? WHERE id = ?",
-                                ("Accepted", ban_id)
-                            )
-
-                            # Increase origin server's integrity (max 100)
-                            await db.execute(
-                                """
-                                UPDATE servers 
-                                SET integrity = MIN(integrity + 1, 100) 
-                                WHERE server_id = ?
-                                """,
-                                (origin_server_id,)
-                            )
-
-                            await db.commit()
-
-                        # Send notification to alert channel
-                        try:
-                            await alert_channel.send(embed=embed)
-                        except discord.errors.Forbidden:
-                            # Bot doesn't have permission to send messages in this channel
-                            print(f"Missing permissions to send auto-ban notification in channel {alert_channel.id} in guild {guild.id}")
-                        except Exception as e:
-                            # Log any other errors that might occur
-                            print(f"Error sending auto-ban notification: {e}")
-
-                    except (discord.Forbidden, discord.HTTPException):
-                        # If auto-ban fails, fall back to sending an alert
-                        await self.send_ban_alert(alert_channel, ban_id, user_id, origin_server_id, 
-                                                origin_server_name, integrity, ban_reason, 
-                                                preferences.get("ping_role_id"))
-                else:
-                    # Send alert with buttons
-                    await self.send_ban_alert(alert_channel, ban_id, user_id, origin_server_id, 
-                                            origin_server_name, integrity, ban_reason, 
-                                            preferences.get("ping_role_id"))
-
-    async def send_ban_alert(self, channel, ban_id, user_id, origin_server_id, origin_server_name, 
-                            integrity, ban_reason, ping_role_id=None):
-        # Create embed for the ban alert
-        embed = discord.Embed(
-            title="⚠️ Ban Alert",
-            description=f"User <@{user_id}> was banned from another server.",
-            color=discord.Color.orange(),
-            timestamp=datetime.now()
-        )
-        embed.add_field(name="Origin Server", value=f"{origin_server_name} (Integrity: {integrity})", inline=False)
-        embed.add_field(name="Ban Reason", value=ban_reason or "No reason provided", inline=False)
-
-        # Create view with Accept and Dismiss buttons
-        view = BanAlertView(ban_id, user_id, origin_server_id, ban_reason, self)
-
-        # Send the alert, pinging the role if specified
-        content = f"<@&{ping_role_id}>" if ping_role_id else None
-        try:
-            await channel.send(content=content, embed=embed, view=view)
-        except discord.errors.Forbidden:
-            # Bot doesn't have permission to send messages in this channel
-            print(f"Missing permissions to send ban alert in channel {channel.id} in guild {channel.guild.id}")
-        except Exception as e:
-            # Log any other errors that might occur
-            print(f"Error sending ban alert: {e}")
-
-    @tasks.loop(minutes=10)
-    async def check_expired_views(self):
-        """Background task to check for and disable expired ban alert views"""
-        # This would require storing message IDs in the database
-        # For simplicity, we're relying on the built-in timeout functionality
-        pass
-
-    @commands.slash_command(name="search", description="Search for a user's ban history")
-    async def search(self, ctx, user: discord.User):
-        # Check if we're in maintenance mode
-        check = await preChecks(ctx)
-        if check is True:
-            return
-
-        # Check if the command is used in a guild
-        if not ctx.guild:
-            await ctx.respond("This command can only be used in a server.", ephemeral=True)
-            return
-
-        # Query the database for ban history
-        async with aiosqlite.connect("database.db") as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                """
-                SELECT b.*, s.integrity 
-                FROM bans b
-                JOIN servers s ON b.origin_server_id = s.server_id
-                WHERE b.user_id = ?
-                ORDER BY b.flagged_at DESC
-                """,
-                (user.id,)
-            ) as cursor:
-                bans = await cursor.fetchall()
-
-        if not bans:
-            await ctx.respond(f"No ban records found for {user.mention}.", ephemeral=True)
-            return
-
-        # Create embed with ban history
-        embed = discord.Embed(
-            title=f"Ban History for {user.name}",
-            description=f"Found {len(bans)} ban records for {user.mention}.",
-            color=discord.Color.blue(),
-            timestamp=datetime.now()
-        )
-
-        for ban in bans:
-            # Get server name if possible
-            server = self.bot.get_guild(ban["origin_server_id"])
-            server_name = server.name if server else f"Unknown Server ({ban['origin_server_id']})"
-
-            # Format the ban date
-            ban_date = datetime.fromtimestamp(ban["flagged_at"]).strftime("%Y-%m-%d %H:%M:%S")
-
-            # Add field for this ban
-            embed.add_field(
-                name=f"Ban from {server_name} (Integrity: {ban['integrity']})",
-                value=f"**Reason:** {ban['ban_reason']}\n"
-                      f"**Date:** {ban_date}\n"
-                      f"**Status:** {ban['status']}",
-                inline=False
-            )
-
-        await ctx.respond(embed=embed, ephemeral=True)
-
-    @commands.slash_command(name="flag", description="Flag a user for review by LinkBot owner")
-    @commands.has_permissions(administrator=True)
-    async def flag(self, ctx, user: discord.User, reason: str, proof_url: str = None):
-        # Check if we're in maintenance mode
-        check = await preChecks(ctx)
-        if check is True:
-            return
-
-        # Check if the command is used in a guild
-        if not ctx.guild:
-            await ctx.respond("This command can only be used in a server.", ephemeral=True)
-            return
-
-        # Record the flag in the database
-        async with aiosqlite.connect("database.db") as db:
-            await db.execute(
-                """
-                INSERT INTO bans (user_id, origin_server_id, flagged_by, ban_reason, flagged_at, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (user.id, ctx.guild.id, ctx.author.id, 
-                 f"{reason}{' | Proof: ' + proof_url if proof_url else ''}", 
-                 datetime.now().timestamp(), "Review")
-            )
-            await db.commit()
-
-        await ctx.respond(
-            f"User {user.mention} has been flagged for review by the LinkBot owner.\n"
-            f"Reason: {reason}",
-            ephemeral=True
-        )
-
-def setup(bot):
-    bot.add_cog(Bans(bot))
+import time
+import asyncio
+import functools
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import aiosqlite
+import discord
+import orjson
+from discord.ext import commands, tasks
+
+from cogs.systems import preChecks
+
+@functools.lru_cache(maxsize=4096)
+def _format_ban_date(ts: int) -> str:
+    """Memoised timestamp formatting - ban histories repeat dates often."""
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+async def admin_gate(interaction) -> bool:
+    """Run the shared button guard; returns True if the click may proceed.
+
+    Defers the response and runs the maintenance check concurrently -
+    they're independent awaits, so there's no reason to pay for them in
+    sequence - then verifies the clicker is an administrator.
+    """
+    _, check = await asyncio.gather(
+        interaction.response.defer(ephemeral=True),
+        preChecks(interaction),
+    )
+    if check is True:
+        return False
+
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.followup.send("You need administrator permissions to use this button.", ephemeral=True)
+        return False
+
+    return True
+
+# Hot statements as module constants: sqlite3 caches compiled statements
+# per connection keyed by the SQL text, so reusing the exact same strings
+# guarantees cache hits on every event (only the IN-list queries stay
+# inline since their placeholder count varies)
+_SQL_GET_BAN = "SELECT user_id, origin_server_id, ban_reason FROM bans WHERE id = ?"
+_SQL_SET_BAN_STATUS = "UPDATE bans SET status = ? WHERE id = ?"
+_SQL_RAISE_INTEGRITY = "UPDATE servers SET integrity = MIN(integrity + 1, 100) WHERE server_id = ?"
+_SQL_LOWER_INTEGRITY = "UPDATE servers SET integrity = MAX(integrity - 1, 0) WHERE server_id = ?"
+_SQL_INSERT_BAN_ACTION = (
+    "INSERT INTO ban_actions (ban_id, action, by_user_id, timestamp) VALUES (?, ?, ?, ?)"
+)
+_SQL_JOIN_BAN_RECORDS = """
+    SELECT b.*, s.integrity, s.server_id, COUNT(*) OVER () AS total_bans
+    FROM bans b
+    JOIN servers s ON b.origin_server_id = s.server_id
+    WHERE b.user_id = ? AND b.status = 'Accepted'
+    ORDER BY b.flagged_at DESC
+    LIMIT 25
+"""
+_SQL_RECENT_BAN_PROBE = "SELECT 1 FROM bans WHERE user_id = ? AND flagged_at > ? LIMIT 1"
+_SQL_FLAGGED_USERS = "SELECT DISTINCT user_id FROM bans WHERE status = 'Accepted'"
+_SQL_INSERT_BAN = """
+    INSERT INTO bans (user_id, origin_server_id, username, flagged_by, ban_reason, flagged_at, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    RETURNING id
+"""
+_SQL_UPSERT_SERVER_INTEGRITY = """
+    INSERT INTO servers (server_id, integrity) VALUES (?, 100)
+    ON CONFLICT(server_id) DO UPDATE SET integrity = integrity
+    RETURNING integrity
+"""
+_SQL_GET_SERVER_ROW = (
+    "SELECT server_id, preferences, blacklisted, integrity FROM servers WHERE server_id = ?"
+)
+_SQL_SEARCH_BANS = """
+    SELECT b.*, s.integrity, COUNT(*) OVER () AS total_bans
+    FROM bans b
+    JOIN servers s ON b.origin_server_id = s.server_id
+    WHERE b.user_id = ?
+    ORDER BY b.flagged_at DESC
+    LIMIT 25
+"""
+_SQL_INSERT_FLAG = """
+    INSERT INTO bans (user_id, origin_server_id, username, flagged_by, ban_reason, flagged_at, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+class BanRateLimit:
+    """Prevents servers from spamming ban alerts"""
+
+    def __init__(self, max_bans: int = 5, time_window: int = 180):
+        self.max_bans = max_bans  # Max bans allowed in the time period
+        self.time_window = time_window  # Time window in seconds (3 minutes default)
+        # Sliding window with just two counters per server: the previous
+        # window's total and the current one, stored as a flat tuple
+        self.server_bans: Dict[int, Tuple[int, int, int]] = {}
+
+    def can_send_alert(self, server_id: int) -> bool:
+        """Checks if a server is rate-limited or can send another ban alert"""
+        now = time.time()
+        window_index = int(now // self.time_window)
+
+        prev_count, curr_count = 0, 0
+        entry = self.server_bans.get(server_id)
+        if entry is not None:
+            stored_index, stored_prev, stored_curr = entry
+            if stored_index == window_index:
+                prev_count, curr_count = stored_prev, stored_curr
+            elif stored_index == window_index - 1:
+                # We just rolled into a new window - what was "current"
+                # becomes "previous"
+                prev_count = stored_curr
+            # Anything older than one window is fully expired, keep zeros
+
+        # Weight the previous window by how much of it still overlaps the
+        # sliding window, so the limit doesn't reset abruptly on rollover
+        elapsed_ratio = (now % self.time_window) / self.time_window
+        effective = prev_count * (1 - elapsed_ratio) + curr_count
+
+        if effective >= self.max_bans:
+            self.server_bans[server_id] = (window_index, prev_count, curr_count)
+            return False
+
+        self.server_bans[server_id] = (window_index, prev_count, curr_count + 1)
+        return True
+
+class BanAlertView(discord.ui.View):
+    """The UI with Accept/Dismiss buttons for ban alerts.
+
+    The view carries no per-alert state and never times out - the ban id
+    rides inside each button's custom_id, and the Bans cog decodes it in
+    its on_interaction listener and loads the rest from the bans table.
+    Alerts therefore survive restarts, and no view object or timer handle
+    lingers in memory per outstanding alert.
+    """
+
+    def __init__(self, ban_id: int, disabled: bool = False):
+        super().__init__(timeout=None)
+        self.add_item(discord.ui.Button(
+            label="Accept", style=discord.ButtonStyle.green, emoji="✅",
+            custom_id=f"accept_ban:{ban_id}", disabled=disabled
+        ))
+        self.add_item(discord.ui.Button(
+            label="Dismiss", style=discord.ButtonStyle.red, emoji="❌",
+            custom_id=f"dismiss_ban:{ban_id}", disabled=disabled
+        ))
+
+class JoinAlertView(discord.ui.View):
+    """UI with Ban/Dismiss buttons for when previously banned users join"""
+
+    def __init__(self, user_id: int, ban_records: List[dict], cog):
+        super().__init__(timeout=86400)  # Buttons expire after 24 hours
+        self.user_id = user_id  # The user who joined
+        self.ban_records = ban_records  # List of ban records for this user
+        self.cog = cog
+        self.expiry_time = datetime.now() + timedelta(hours=24)
+
+    @discord.ui.button(label="Ban", style=discord.ButtonStyle.red, emoji="🔨", custom_id="ban_user")
+    async def ban_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await admin_gate(interaction):
+            return
+
+        # Ban the user in this server
+        try:
+            # Get the most recent ban reason from the records
+            most_recent_ban = max(self.ban_records, key=lambda x: x["flagged_at"])
+            ban_reason = most_recent_ban["ban_reason"]
+
+            await interaction.guild.ban(
+                discord.Object(id=self.user_id),
+                reason=f"LinkBot: User was previously banned in other servers. Most recent reason: {ban_reason}"
+            )
+            success_msg = f"User <@{self.user_id}> has been banned in this server."
+        except discord.Forbidden:
+            success_msg = "I don't have permission to ban this user."
+        except discord.HTTPException:
+            success_msg = "Failed to ban the user. They may have already left or been banned."
+
+        # Disable all buttons
+        for item in self.children:
+            item.disabled = True
+
+        # Update the message
+        embed = interaction.message.embeds[0]
+        embed.add_field(name="Status", value=f"🔨 Banned by {interaction.user.mention}", inline=False)
+
+        await interaction.edit_original_response(embed=embed, view=self)
+        await interaction.followup.send(success_msg, ephemeral=True)
+
+    @discord.ui.button(label="Dismiss", style=discord.ButtonStyle.green, emoji="✓", custom_id="dismiss_join_alert")
+    async def dismiss_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await admin_gate(interaction):
+            return
+
+        # Disable all buttons
+        for item in self.children:
+            item.disabled = True
+
+        # Update the message
+        embed = interaction.message.embeds[0]
+        embed.add_field(name="Status", value=f"✓ Dismissed by {interaction.user.mention}", inline=False)
+
+        await interaction.edit_original_response(embed=embed, view=self)
+        await interaction.followup.send("Alert dismissed. No action taken against the user.", ephemeral=True)
+
+    async def on_timeout(self):
+        # Disable all buttons when the view times out (after 24 hours)
+        for item in self.children:
+            item.disabled = True
+
+        # We can't update the message here since we don't have a reference to it
+        # This will be handled by a background task that checks for expired views
+
+class Bans(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.rate_limiter = BanRateLimit()
+        self.db = None  # Shared write connection, opened lazily via get_db()
+        self.read_db = None  # Read-only companion, opened lazily via get_read_db()
+        # servers rows keyed by server_id, loaded on_ready and kept in step
+        # with this cog's own writes - the fan-out reads from here instead
+        # of hitting SQLite once per guild per ban
+        self.server_cache: Dict[int, dict] = {}
+        # Ban events queued by on_member_ban for the settle-delay worker
+        self.pending_bans = deque()
+        # Every user with an accepted ban, so clean joins (the vast
+        # majority) skip the database entirely; None until loaded
+        self.flagged_users: Optional[set] = None
+        self.gc_rate_limits.start()
+        self.process_ban_queue.start()
+
+    def cog_unload(self):
+        self.gc_rate_limits.cancel()
+        self.process_ban_queue.cancel()
+
+        # Close the shared connections
+        for attr in ("db", "read_db"):
+            conn = getattr(self, attr)
+            if conn is not None:
+                setattr(self, attr, None)
+                self.bot.loop.create_task(conn.close())
+
+    async def get_db(self):
+        """Get the shared database connection, opening it on first use.
+
+        Opening the database file per operation pays thread-spawn and
+        file-open overhead on every ban event - and the fan-out path used to
+        do it once per guild. One long-lived connection serves them all.
+        """
+        if self.db is None:
+            self.db = await aiosqlite.connect("database.db", cached_statements=256)
+            self.db.row_factory = aiosqlite.Row
+            # Tune the connection once - WAL keeps reads running alongside
+            # the write-heavy fan-out, NORMAL drops the per-commit fsync cost
+            await self.db.executescript(
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=5000;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA cache_size=-64000;"
+                "PRAGMA mmap_size=268435456;"
+                "PRAGMA foreign_keys=ON;"
+            )
+        return self.db
+
+    async def get_read_db(self):
+        """Get the read-only companion connection, opening it on first use.
+
+        Under WAL readers never block behind the writer at the SQLite level,
+        but a single aiosqlite connection still funnels every statement
+        through one worker thread - so lookups would queue behind write
+        commits. Routing reads through their own connection keeps them
+        flowing during ban fan-outs.
+        """
+        if self.read_db is None:
+            self.read_db = await aiosqlite.connect("file:database.db?mode=ro", uri=True, cached_statements=256)
+            self.read_db.row_factory = aiosqlite.Row
+            await self.read_db.executescript(
+                "PRAGMA busy_timeout=5000;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA cache_size=-64000;"
+                "PRAGMA mmap_size=268435456;"
+            )
+        return self.read_db
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Check if a joining user was previously banned in other servers"""
+        # Skip bots
+        if member.bot:
+            return
+
+        # The common case is a user with no ban history - answer it from
+        # the in-memory set without any database work
+        if self.flagged_users is not None and member.id not in self.flagged_users:
+            return
+
+        # Query the database for ban records for this user
+        db = await self.get_read_db()
+        ban_records = await db.execute_fetchall(_SQL_JOIN_BAN_RECORDS, (member.id,))
+
+        # If no ban records found, do nothing
+        if not ban_records:
+            return
+
+        # Get the server's preferences, parsed once at cache-load time
+        server_data = await self.get_cached_server(member.guild.id)
+        if not server_data:
+            return
+
+        preferences = server_data["preferences"]
+
+        # Get alert channel
+        alert_channel_id = preferences.get("alert_channel_id")
+        if not alert_channel_id:
+            return
+
+        alert_channel = member.guild.get_channel(alert_channel_id)
+        if not alert_channel:
+            return
+
+        # The query is capped at 25 rows; the window count carries the
+        # real total
+        total_bans = ban_records[0]["total_bans"]
+
+        # Create embed for the join alert
+        embed = discord.Embed(
+            title="⚠️ Previously Banned User Joined",
+            description=f"User {member.mention} has joined this server but has been banned in {total_bans} other server(s).",
+            color=discord.Color.gold(),
+            timestamp=datetime.now()
+        )
+
+        # Add information about the most recent ban
+        most_recent_ban = ban_records[0]
+        server = self.bot.get_guild(most_recent_ban["origin_server_id"])
+        server_name = server.name if server else f"Unknown Server ({most_recent_ban['origin_server_id']})"
+
+        embed.add_field(
+            name="Most Recent Ban",
+            value=f"**Server:** {server_name} (Integrity: {most_recent_ban['integrity']})\n"
+                  f"**Reason:** {most_recent_ban['ban_reason']}\n"
+                  f"**Date:** {datetime.fromtimestamp(most_recent_ban['flagged_at']).strftime('%Y-%m-%d %H:%M:%S')}",
+            inline=False
+        )
+
+        # Add total ban count
+        embed.add_field(
+            name="Ban History",
+            value=f"This user has been banned in {total_bans} server(s). Use `/search {member.mention}` for details.",
+            inline=False
+        )
+
+        # Create view with Ban and Dismiss buttons
+        view = JoinAlertView(member.id, ban_records, self)
+
+        # Send the alert, pinging the role if specified
+        ping_role_id = preferences.get("ping_role_id")
+        content = f"<@&{ping_role_id}>" if ping_role_id else None
+        try:
+            await alert_channel.send(content=content, embed=embed, view=view)
+        except discord.errors.Forbidden:
+            # Bot doesn't have permission to send messages in this channel
+            print(f"Missing permissions to send join alert in channel {alert_channel.id} in guild {member.guild.id}")
+        except Exception as e:
+            # Log any other errors that might occur
+            print(f"Error sending join alert: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        db = await self.get_db()
+
+        # Create bans table
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                origin_server_id INTEGER NOT NULL,
+                username TEXT,
+                flagged_by INTEGER NOT NULL,
+                ban_reason TEXT,
+                flagged_at REAL NOT NULL,
+                status TEXT DEFAULT 'Pending'
+            )
+            """
+        )
+
+        # Databases created before usernames were recorded need the column
+        # added; existing rows stay NULL (we can't recover those names)
+        try:
+            await db.execute("ALTER TABLE bans ADD COLUMN username TEXT")
+        except aiosqlite.OperationalError:
+            pass  # Column already exists
+
+        # Create ban_actions table for logging accept/dismiss actions
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ban_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ban_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                by_user_id INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                FOREIGN KEY (ban_id) REFERENCES bans (id)
+            )
+            """
+        )
+
+        # Ban lookups filter on origin_server_id (alt detection, alerts)
+        # and join ban_actions on (ban_id, action); without these indexes
+        # both are full-table scans
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bans_origin_server ON bans (origin_server_id)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ban_actions_ban_action ON ban_actions (ban_id, action)"
+        )
+        # The alt-detection previous-ban rule probes (origin_server_id,
+        # username) on every flagged join
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bans_origin_username ON bans (origin_server_id, username)"
+        )
+        # /search and the join alert look up bans by user, newest first
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bans_user_id ON bans (user_id, flagged_at DESC)"
+        )
+
+        # Refresh planner statistics so the indexes actually get picked
+        await db.execute("ANALYZE")
+
+        await db.commit()
+
+        # Warm the server cache so ban fan-outs never touch the database
+        # for rows that haven't changed
+        rows = await db.execute_fetchall(
+            "SELECT server_id, preferences, blacklisted, integrity FROM servers"
+        )
+        for row in rows:
+            self._cache_server_row(row)
+
+        # Load the set of users with accepted bans - on_member_join checks
+        # it before touching the database
+        rows = await db.execute_fetchall(_SQL_FLAGGED_USERS)
+        self.flagged_users = {row[0] for row in rows}
+
+    def _cache_server_row(self, row):
+        """Store a servers row in the cache, keyed by server_id.
+
+        Preferences are decoded here, once per row change, instead of on
+        every ban event - the fan-out just reads the parsed dict. The
+        blocked-servers list becomes a frozenset so the origin check is a
+        hash lookup.
+        """
+        try:
+            preferences = orjson.loads(row[1]) if row[1] else {}
+        except orjson.JSONDecodeError:
+            preferences = {}
+
+        self.server_cache[row[0]] = {
+            "preferences": preferences,
+            "blocked_servers": frozenset(preferences.get("blocked_servers", ())),
+            "blacklisted": row[2],
+            "integrity": row[3],
+            # Decided once per row change so the fan-out can skip
+            # blacklisted and unconfigured servers with a single check
+            "alert_ready": not row[2] and preferences.get("alert_channel_id") is not None,
+        }
+
+    def _bump_cached_integrity(self, server_id: int, delta: int):
+        """Mirror an integrity UPDATE into the cache (clamped to 0..100)."""
+        entry = self.server_cache.get(server_id)
+        if entry is not None:
+            entry["integrity"] = max(0, min(entry["integrity"] + delta, 100))
+
+    async def get_cached_server(self, server_id: int) -> Optional[dict]:
+        """Return a server's cached row, loading and caching it on a miss."""
+        entry = self.server_cache.get(server_id)
+        if entry is None:
+            read_db = await self.get_read_db()
+            cursor = await read_db.execute(_SQL_GET_SERVER_ROW, (server_id,))
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            self._cache_server_row(row)
+            entry = self.server_cache[server_id]
+        return entry
+
+    def invalidate_server(self, server_id: int):
+        """Drop a server's cached row so the next lookup reloads it.
+
+        This cog mirrors its own writes into the cache, but preferences and
+        the blacklist flag are also written by the dashboard, the setup
+        wizard and /strike - those paths call this so the fan-out doesn't
+        keep serving their stale settings until a restart.
+        """
+        self.server_cache.pop(server_id, None)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction):
+        """Route ban alert button clicks by the ban id in their custom_id."""
+        if interaction.type != discord.InteractionType.component:
+            return
+
+        custom_id = (interaction.data or {}).get("custom_id", "")
+        if custom_id.startswith("accept_ban:"):
+            await self.handle_ban_action(interaction, int(custom_id.split(":", 1)[1]), accept=True)
+        elif custom_id.startswith("dismiss_ban:"):
+            await self.handle_ban_action(interaction, int(custom_id.split(":", 1)[1]), accept=False)
+
+    async def handle_ban_action(self, interaction, ban_id: int, accept: bool):
+        """Accept or dismiss a ban alert.
+
+        State comes from the bans table rather than the view object, so
+        clicks on alerts sent before the last restart still work.
+        """
+        if not await admin_gate(interaction):
+            return
+
+        # Look up the alert's ban record
+        read_db = await self.get_read_db()
+        cursor = await read_db.execute(_SQL_GET_BAN, (ban_id,))
+        ban = await cursor.fetchone()
+        if ban is None:
+            await interaction.followup.send("This ban record no longer exists.", ephemeral=True)
+            return
+
+        user_id, origin_server_id, ban_reason = ban
+        action = "Accepted" if accept else "Dismissed"
+
+        db = await self.get_db()
+
+        # Update ban status
+        await db.execute(_SQL_SET_BAN_STATUS, (action, ban_id))
+
+        # Adjust the origin server's integrity (kept between 0 and 100)
+        await db.execute(
+            _SQL_RAISE_INTEGRITY if accept else _SQL_LOWER_INTEGRITY,
+            (origin_server_id,)
+        )
+
+        # Log the action
+        await db.execute(
+            _SQL_INSERT_BAN_ACTION,
+            (ban_id, action, interaction.user.id, time.time())
+        )
+
+        await db.commit()
+        self._bump_cached_integrity(origin_server_id, 1 if accept else -1)
+        if accept and self.flagged_users is not None:
+            self.flagged_users.add(user_id)
+
+        if accept:
+            # Ban the user in this server
+            try:
+                await interaction.guild.ban(
+                    discord.Object(id=user_id),
+                    reason=f"LinkBot: Ban accepted from server {origin_server_id}. Original reason: {ban_reason}"
+                )
+                followup_msg = f"User <@{user_id}> has been banned in this server."
+            except discord.Forbidden:
+                followup_msg = "I don't have permission to ban this user."
+            except discord.HTTPException:
+                followup_msg = "Failed to ban the user. They may have already left or been banned."
+        else:
+            followup_msg = "Ban alert dismissed."
+
+        # Update the message with the outcome and disabled buttons
+        embed = interaction.message.embeds[0]
+        marker = "✅ Accepted" if accept else "❌ Dismissed"
+        embed.add_field(name="Status", value=f"{marker} by {interaction.user.mention}", inline=False)
+
+        await interaction.edit_original_response(embed=embed, view=BanAlertView(ban_id, disabled=True))
+        await interaction.followup.send(followup_msg, ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        # Just queue the event - the worker waits out the audit-log settle
+        # window, so this listener returns without holding a coroutine for
+        # two seconds per ban
+        self.pending_bans.append((guild, user, time.time()))
+
+    @tasks.loop(seconds=1)
+    async def process_ban_queue(self):
+        """Handle queued ban events once their audit logs have settled.
+
+        Bans that land close together in the same guild share a single
+        audit-log fetch instead of paying one request (and a two second
+        inline wait) each.
+        """
+        now = time.time()
+        by_guild = {}
+        while self.pending_bans and now - self.pending_bans[0][2] >= 2:
+            guild, user, _ = self.pending_bans.popleft()
+            by_guild.setdefault(guild.id, (guild, {}))[1][user.id] = user
+
+        for guild, users in by_guild.values():
+            # One guild failing must not escape the loop body - tasks.loop
+            # stops the whole loop on an uncaught exception, which would
+            # silently end ban processing until a restart
+            try:
+                # Skip unknown or blacklisted servers before paying for the
+                # audit-log request
+                server_data = await self.get_cached_server(guild.id)
+                if not server_data or server_data["blacklisted"]:
+                    continue
+
+                # One fetch covers every queued ban in this guild
+                entries = {}
+                try:
+                    async for entry in guild.audit_logs(
+                        limit=max(len(users), 5), action=discord.AuditLogAction.ban
+                    ):
+                        if entry.target.id in users and entry.target.id not in entries:
+                            entries[entry.target.id] = entry
+                except discord.Forbidden:
+                    # Bot doesn't have permission to view audit logs
+                    continue
+
+                for user_id, user in users.items():
+                    entry = entries.get(user_id)
+
+                    # If no reason is found, ignore this ban
+                    if entry is None or not entry.reason:
+                        continue
+
+                    # Ignore bans issued by the bot itself
+                    if entry.user.id == self.bot.user.id:
+                        continue
+
+                    try:
+                        await self.process_ban(guild, user, entry.reason, entry.user.id)
+                    except Exception as e:
+                        print(f"Error processing ban of {user_id} in guild {guild.id}: {e}")
+            except Exception as e:
+                print(f"Error processing queued bans in guild {guild.id}: {e}")
+
+    async def process_ban(self, guild, user, ban_reason, moderator_id):
+        """Record a ban and fan out alerts to the other servers."""
+        db = await self.get_db()
+
+        # Check rate limit
+        if not self.rate_limiter.can_send_alert(guild.id):
+            return
+
+        # Check if an alert has already been sent for this user recently -
+        # the any-server check subsumes the per-server one, so one probe
+        # against the (user_id, flagged_at) index covers both
+        current_time = time.time()
+        time_threshold = current_time - 300  # 5 minutes ago
+
+        cursor = await db.execute(_SQL_RECENT_BAN_PROBE, (user.id, time_threshold))
+        existing_recent_ban = await cursor.fetchone()
+
+        # If an alert has already been sent recently, ignore this ban
+        if existing_recent_ban:
+            return
+
+        # Record the ban and make sure the origin server has a row - one
+        # transaction with a single fsync instead of a commit per statement
+        cursor = await db.execute(
+            _SQL_INSERT_BAN,
+            (user.id, guild.id, user.name, moderator_id, ban_reason, current_time, "Pending")
+        )
+        ban_id = (await cursor.fetchone())[0]
+
+        # Ensure the origin server has a row and read its integrity in one
+        # statement - the no-op DO UPDATE makes RETURNING fire either way
+        cursor = await db.execute(_SQL_UPSERT_SERVER_INTEGRITY, (guild.id,))
+        integrity = (await cursor.fetchone())[0]
+        await db.commit()
+
+        if guild.id not in self.server_cache:
+            self._cache_server_row((guild.id, None, 0, integrity))
+
+        # Send ban alerts to other servers
+        await self.send_ban_alerts(ban_id, user.id, guild.id, guild.name, integrity, ban_reason, moderator_id)
+
+    async def send_ban_alerts(self, ban_id, user_id, origin_server_id, origin_server_name, 
+                             integrity, ban_reason, moderator_id):
+        db = await self.get_db()
+        read_db = await self.get_read_db()
+
+        guild_ids = [g.id for g in self.bot.guilds if g.id != origin_server_id]
+        if not guild_ids:
+            return
+
+        # Serve the fan-out from the in-memory cache; only guilds we haven't
+        # seen yet (set up since on_ready) cost a single batched query
+        uncached = [gid for gid in guild_ids if gid not in self.server_cache]
+        if uncached:
+            placeholders = ",".join("?" * len(uncached))
+            rows = await read_db.execute_fetchall(
+                f"SELECT server_id, preferences, blacklisted, integrity FROM servers WHERE server_id IN ({placeholders})",
+                uncached
+            )
+            for row in rows:
+                self._cache_server_row(row)
+
+        # Embed content is identical for every guild in a fan-out, so build
+        # the alert and the auto-ban notification once and reuse them
+        alert_embed = discord.Embed(
+            title="⚠️ Ban Alert",
+            description=f"User <@{user_id}> was banned from another server.",
+            color=discord.Color.orange(),
+            timestamp=datetime.now()
+        )
+        alert_embed.add_field(name="Origin Server", value=f"{origin_server_name} (Integrity: {integrity})", inline=False)
+        alert_embed.add_field(name="Ban Reason", value=ban_reason or "No reason provided", inline=False)
+
+        auto_ban_embed = discord.Embed(
+            title="⚠️ Auto-Ban Alert",
+            description=f"User <@{user_id}> was automatically banned based on a ban from another server.",
+            color=discord.Color.red(),
+            timestamp=datetime.now()
+        )
+        auto_ban_embed.add_field(name="Origin Server", value=f"{origin_server_name} (Integrity: {integrity})", inline=False)
+        auto_ban_embed.add_field(name="Ban Reason", value=ban_reason or "No reason provided", inline=False)
+
+        # Cap concurrent guilds so we don't slam Discord's per-route buckets
+        semaphore = asyncio.Semaphore(10)
+
+        async def process_guild(guild, preferences, alert_channel):
+            """Handle one guild's alert; returns 1 if the user was auto-banned."""
+            async with semaphore:
+                # Check if we should auto-ban or send alert
+                if preferences.get("auto_ban", False) and integrity >= 50:
+                    # Auto-ban the user
+                    try:
+                        await guild.ban(
+                            discord.Object(id=user_id),
+                            reason=f"LinkBot: Auto-ban from server {origin_server_name} (ID: {origin_server_id}). Original reason: {ban_reason}"
+                        )
+
+                        # Send notification to alert channel
+                        try:
+                            await alert_channel.send(embed=auto_ban_embed)
+                        except discord.errors.Forbidden:
+                            # Bot doesn't have permission to send messages in this channel
+                            print(f"Missing permissions to send auto-ban notification in channel {alert_channel.id} in guild {guild.id}")
+                        except Exception as e:
+                            # Log any other errors that might occur
+                            print(f"Error sending auto-ban notification: {e}")
+
+                        return 1
+
+                    except (discord.Forbidden, discord.HTTPException):
+                        # If auto-ban fails, fall back to sending an alert
+                        await self.send_ban_alert(alert_channel, alert_embed, ban_id,
+                                                preferences.get("ping_role_id"))
+                else:
+                    # Send alert with buttons
+                    await self.send_ban_alert(alert_channel, alert_embed, ban_id,
+                                            preferences.get("ping_role_id"))
+            return 0
+
+        # Filter guilds synchronously from the cache, then fan out all the
+        # Discord calls in parallel instead of awaiting one guild at a time
+        coros = []
+        for guild in self.bot.guilds:
+            # Skip the origin server
+            if guild.id == origin_server_id:
+                continue
+
+            server_data = self.server_cache.get(guild.id)
+
+            # Skip servers that are missing, blacklisted, or have no alert
+            # channel configured - decided once at cache-load time
+            if not server_data or not server_data["alert_ready"]:
+                continue
+
+            # Check if this server has blocked the origin server
+            if origin_server_id in server_data["blocked_servers"]:
+                continue
+
+            # Preferences were parsed at cache-load time
+            preferences = server_data["preferences"]
+
+            alert_channel = guild.get_channel(preferences["alert_channel_id"])
+            if not alert_channel:
+                continue
+
+            coros.append(process_guild(guild, preferences, alert_channel))
+
+        # Auto-ban writes are identical per accepting guild, so tally them
+        # from the results and flush one transaction at the end
+        auto_ban_count = 0
+        if coros:
+            results = await asyncio.gather(*coros, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Error processing ban alert for a guild: {result}")
+                else:
+                    auto_ban_count += result
+
+        if auto_ban_count:
+            # Mark the ban Accepted and credit the origin server once for the
+            # whole fan-out - one commit instead of two statements plus an
+            # fsync per auto-banning guild
+            await db.execute(
+                "UPDATE bans SET status = ? WHERE id = ?",
+                ("Accepted", ban_id)
+            )
+            await db.execute(
+                """
+                UPDATE servers 
+                SET integrity = MIN(integrity + ?, 100) 
+                WHERE server_id = ?
+                """,
+                (auto_ban_count, origin_server_id)
+            )
+            await db.commit()
+            self._bump_cached_integrity(origin_server_id, auto_ban_count)
+            if self.flagged_users is not None:
+                self.flagged_users.add(user_id)
+
+    async def send_ban_alert(self, channel, embed, ban_id, ping_role_id=None):
+        # The embed is built once per fan-out by send_ban_alerts and shared
+        # across guilds - only the ping content differs per channel
+
+        # Create view with Accept and Dismiss buttons
+        view = BanAlertView(ban_id)
+
+        # Send the alert, pinging the role if specified
+        content = f"<@&{ping_role_id}>" if ping_role_id else None
+        try:
+            await channel.send(content=content, embed=embed, view=view)
+        except discord.errors.Forbidden:
+            # Bot doesn't have permission to send messages in this channel
+            print(f"Missing permissions to send ban alert in channel {channel.id} in guild {channel.guild.id}")
+        except Exception as e:
+            # Log any other errors that might occur
+            print(f"Error sending ban alert: {e}")
+
+    @tasks.loop(hours=1)
+    async def gc_rate_limits(self):
+        """Drop rate limit entries whose window has fully expired.
+
+        Without this sweep every guild that ever banned someone keeps a
+        dict slot forever - a slow leak across thousands of guilds.
+        """
+        rate_limiter = self.rate_limiter
+        current_index = int(time.time() // rate_limiter.time_window)
+        stale = [
+            server_id
+            for server_id, (window_index, _, _) in rate_limiter.server_bans.items()
+            if window_index < current_index - 1
+        ]
+        for server_id in stale:
+            del rate_limiter.server_bans[server_id]
+
+    @commands.slash_command(name="search", description="Search for a user's ban history")
+    async def search(self, ctx, user: discord.User):
+        # Check if we're in maintenance mode
+        check = await preChecks(ctx)
+        if check is True:
+            return
+
+        # Check if the command is used in a guild
+        if not ctx.guild:
+            await ctx.respond("This command can only be used in a server.", ephemeral=True)
+            return
+
+        # Query the database for ban history
+        db = await self.get_read_db()
+        bans = await db.execute_fetchall(_SQL_SEARCH_BANS, (user.id,))
+
+        if not bans:
+            await ctx.respond(f"No ban records found for {user.mention}.", ephemeral=True)
+            return
+
+        # Create embed with ban history
+        embed = discord.Embed(
+            title=f"Ban History for {user.name}",
+            description=f"Found {bans[0]['total_bans']} ban records for {user.mention} (showing the {len(bans)} most recent).",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+
+        # Resolve guild names once for the whole result set
+        guild_names = {g.id: g.name for g in self.bot.guilds}
+
+        for ban in bans:
+            # Get server name if possible
+            origin_id = ban["origin_server_id"]
+            server_name = guild_names.get(origin_id, f"Unknown Server ({origin_id})")
+
+            # Format the ban date
+            ban_date = _format_ban_date(int(ban["flagged_at"]))
+
+            # Add field for this ban
+            embed.add_field(
+                name=f"Ban from {server_name} (Integrity: {ban['integrity']})",
+                value=f"**Reason:** {ban['ban_reason']}\n"
+                      f"**Date:** {ban_date}\n"
+                      f"**Status:** {ban['status']}",
+                inline=False
+            )
+
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    @commands.slash_command(name="flag", description="Flag a user for review by LinkBot owner")
+    @commands.has_permissions(administrator=True)
+    async def flag(self, ctx, user: discord.User, reason: str, proof_url: str = None):
+        # Check if we're in maintenance mode
+        check = await preChecks(ctx)
+        if check is True:
+            return
+
+        # Check if the command is used in a guild
+        if not ctx.guild:
+            await ctx.respond("This command can only be used in a server.", ephemeral=True)
+            return
+
+        # Record the flag in the database
+        db = await self.get_db()
+        await db.execute(
+            _SQL_INSERT_FLAG,
+            (user.id, ctx.guild.id, user.name, ctx.author.id,
+             f"{reason}{' | Proof: ' + proof_url if proof_url else ''}", 
+             time.time(), "Review")
+        )
+        await db.commit()
+
+        await ctx.respond(
+            f"User {user.mention} has been flagged for review by the LinkBot owner.\n"
+            f"Reason: {reason}",
+            ephemeral=True
+        )
+
+def setup(bot):
+    bot.add_cog(Bans(bot))
@@ -192,6 +192,12 @@ class Review(commands.Cog):
                 )
                 await db.commit()
 
+        # Drop the Bans cog's cached row so the blacklist takes effect
+        # immediately instead of after a restart
+        bans_cog = self.bot.get_cog("Bans")
+        if bans_cog:
+            bans_cog.invalidate_server(server_id)
+
         # Try to get the server name
         server = self.bot.get_guild(server_id)
         server_name = server.name if server else f"Unknown Server ({server_id})"
@@ -1,5 +1,6 @@
 from discord.ext import commands
 import aiosqlite
+import itertools
 import json
 from discord.ext.bridge import bridge_command
 from discord.ext.commands import command
@@ -463,6 +464,11 @@ class Systems(commands.Cog):
 
             await db.commit()
 
+        # Drop the Bans cog's cached copy of this server's preferences
+        bans_cog = self.bot.get_cog("Bans")
+        if bans_cog:
+            bans_cog.invalidate_server(ctx.guild.id)
+
         # Let them know it worked
         embed = discord.Embed(
             title="Prefix Updated",
@@ -762,6 +768,18 @@ class NewSetupView(discord.ui.View):
 
             await db.commit()
 
+        # The Bans cog caches server rows - drop this server's entry so the
+        # freshly saved preferences take effect right away
+        bans_cog = self.bot.get_cog("Bans")
+        if bans_cog:
+            bans_cog.invalidate_server(self.guild_id)
+
+        # Same for the Alts cog, whose enabled gate would otherwise keep
+        # skipping joins for a server that just re-enabled alt detection
+        alts_cog = self.bot.get_cog("Alts")
+        if alts_cog:
+            alts_cog.invalidate_guild(self.guild_id)
+
         # Create a nice completion message
         embed = discord.Embed(
             title="Setup Complete!",
@@ -900,15 +918,20 @@ class RoleSelect(discord.ui.Select):
         self.cog = cog
         self.guild_id = guild_id
 
-        options = [
-            discord.SelectOption(
-                label=f"@{role.name}",
-                value=str(role.id),
-                description=f"Ping {role.name} for ban alerts"
-            )
-            for role in self.cog.bot.get_guild(guild_id).roles
-            if not role.is_default() and not role.is_bot_managed()
-        ][:25]  # Limit to 25 roles
+        # Stop as soon as 25 roles qualify instead of building options for
+        # every role on the server and throwing most of them away
+        options = list(itertools.islice(
+            (
+                discord.SelectOption(
+                    label=f"@{role.name}",
+                    value=str(role.id),
+                    description=f"Ping {role.name} for ban alerts"
+                )
+                for role in self.cog.bot.get_guild(guild_id).roles
+                if not role.is_default() and not role.is_bot_managed()
+            ),
+            25  # Limit to 25 roles
+        ))
 
         super().__init__(
             placeholder="Select a role to ping for ban alerts",